@@ -1,23 +1,40 @@
 import os
+import re
+import time
+import argparse
+import cProfile
+import pstats
+import shutil
 import asyncio
+import functools
 from typing import List
-from pydantic import BaseModel
-from crawl4ai import AsyncWebCrawler
-from pydantic_ai import Agent
-from dotenv import load_dotenv
+import requests
+from pydantic import BaseModel, ValidationError
 
-from utils.subtitles_generator import generate_audio_and_subtitle
-from utils.image_downloader import download_image
-from utils.image_generator import generate_image
-from utils.video_generator import preprocess_images, create_video_with_audio_and_subtitles
+from utils.subtitles_generator import generate_audio_and_subtitle, synthesize_scene_audio, \
+    write_subtitles_and_manifest, TTS_WORKERS
+from utils.image_downloader import fetch_image
+from utils.image_generator import generate_image, IMAGE_MODEL, IMAGE_SIZE
+from utils.cache import DiskCache, hash_text
+from utils.video_generator import preprocess_images, RENDER_JOBS, RENDER_MODE, ENCODE_PROFILE, ENCODE_PROFILES, \
+    PREPROCESS_WORKERS, OUTPUT_VARIANTS, preprocess_keyed_image, read_preprocess_keys, write_preprocess_keys, prepare_scene, render_scene_segment, concat_scenes, \
+    variant_targets, render_targets, fan_out
+from utils import video_generator as video_settings
+from utils.tts import TTS_MODEL
+from utils.manifest import read_manifest, MANIFEST_PATH
+from utils.job_state import JobState, JOB_STATE_PATH, fingerprint, files_digest
+from utils.pools import ResourcePools
+from utils.crawler_pool import CrawlerPool
+from utils.job_queue import JobQueue, QUEUE_PATH
+from utils.service import start_service_server
+from utils.instrumentation import tracer
+from utils.rate_limit import ReelUsage, PRIORITIES, PRIORITY_INTERACTIVE, PRIORITY_BATCH, limiter_stats
+from utils import config, http_client
+from utils.http_client import backoff_delay, pool_stats
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
-
-if not OPENAI_API_KEY or not DEEPGRAM_API_KEY:
-    raise ValueError("Missing API keys in environment variables.")
+# Scraped articles are reused for ARTICLE_TTL seconds; after that they are
+# revalidated with the server's ETag/Last-Modified before re-crawling
+ARTICLE_TTL = 6 * 60 * 60
 
 # Data Models
 class Scene(BaseModel):
@@ -31,84 +48,792 @@ class YouTubeShortsScript(BaseModel):
 
 # Web Scraper
 class WebScraper:
-    def __init__(self, url: str):
+    def __init__(self, url: str, cache: DiskCache = None, use_cache: bool = True, ttl: float = ARTICLE_TTL,
+                 crawler_pool: CrawlerPool = None):
         self.url = url
-        self.client = AsyncWebCrawler()
+        # With a shared pool the browser is already warm; otherwise launch one for this URL
+        self.crawler_pool = crawler_pool
+        self.client = None
+        if crawler_pool is None:
+            # Heavy browser stack; only imported when this scraper launches its own crawler
+            from crawl4ai import AsyncWebCrawler
+
+            self.client = AsyncWebCrawler()
+        self.cache = cache or DiskCache(namespace="articles", max_bytes=256 * 1024 ** 2)
+        self.use_cache = use_cache
+        self.ttl = ttl
 
     async def scrape(self) -> str:
-        async with self.client as crawler:
-            result = await crawler.arun(url=self.url)
-            return result.markdown
+        key = DiskCache.make_key("article", self.url)
+        if self.use_cache:
+            article_text = await asyncio.get_running_loop().run_in_executor(None, self._restore_from_cache, key)
+            if article_text is not None:
+                print(f"Using cached article for {self.url}")
+                return article_text
+
+        if self.crawler_pool is not None:
+            result = await self.crawler_pool.fetch(self.url)
+        else:
+            async with self.client as crawler:
+                result = await crawler.arun(url=self.url)
+
+        article_text = str(result.markdown or "")
+        if self.use_cache and article_text:
+            headers = {name.lower(): value for name, value in (getattr(result, "response_headers", None) or {}).items()}
+            self.cache.put(key, article_text.encode("utf-8"), meta={
+                "url": self.url,
+                "fetched_at": time.time(),
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+            })
+        return article_text
+
+    def _restore_from_cache(self, key: str):
+        """
+        Return the cached markdown if it is within the TTL or the server says it
+        has not changed since, otherwise None
+        """
+        meta = self.cache.get_meta(key)
+        if meta is None:
+            return None
+        if time.time() - meta.get("fetched_at", 0) > self.ttl:
+            if not self._not_modified(meta):
+                return None
+            meta["fetched_at"] = time.time()
+            data = self.cache.get(key)
+            if data is not None:
+                self.cache.put(key, data, meta=meta)
+        else:
+            data = self.cache.get(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def _not_modified(self, meta: dict) -> bool:
+        """
+        Ask the server whether the article changed, using a conditional GET
+        """
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        if not headers:
+            return False
+        try:
+            response = http_client.request("GET", self.url, max_retries=0, headers=headers, stream=True)
+        except requests.RequestException:
+            return False
+        response.close()
+        return response.status_code == 304
 
 # Scene Generator
 class SceneGenerator:
+    MODEL = 'openai:gpt-4o-mini'
     SYSTEM_PROMPT = """You are an advanced language model tasked with analyzing news articles and generating a YouTube Shorts video script..."""
 
-    def __init__(self):
+    def __init__(self, cache: DiskCache = None, use_cache: bool = True):
+        from pydantic_ai import Agent
+
         self.agent = Agent(
-            model='openai:gpt-4o-mini',
+            model=self.MODEL,
             system_prompt=self.SYSTEM_PROMPT,
             result_type=YouTubeShortsScript,
         )
+        self.cache = cache or DiskCache(namespace="scenes", max_bytes=64 * 1024 ** 2)
+        self.use_cache = use_cache
+
+    def _cache_key(self, article_text: str) -> str:
+        return DiskCache.make_key(self.MODEL, hash_text(self.SYSTEM_PROMPT), hash_text(article_text))
+
+    def _restore_from_cache(self, key: str):
+        """
+        Return the cached script's scenes, or None on a miss or an entry that no longer validates
+        """
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        try:
+            return YouTubeShortsScript.model_validate_json(data).scenes
+        except ValidationError:
+            return None
 
-    async def generate_scenes(self, article_text: str) -> List[Scene]:
-        result = await self.agent.run(article_text)
+    async def generate_scenes(self, article_text: str, usage: ReelUsage = None) -> List[Scene]:
+        key = self._cache_key(article_text)
+        if self.use_cache:
+            scenes = self._restore_from_cache(key)
+            if scenes is not None:
+                print("Using cached scene script")
+                return scenes
+
+        try:
+            result = await self.agent.run(article_text)
+        except Exception:
+            if usage:
+                usage.record("openai.chat", ok=False)
+            raise
+        if usage:
+            run_usage = result.usage() if hasattr(result, "usage") else None
+            usage.record("openai.chat", units=getattr(run_usage, "total_tokens", None) or 0)
+        if self.use_cache:
+            self.cache.put(key, result.data.model_dump_json().encode("utf-8"), meta={"model": self.MODEL})
         return result.data.scenes
 
 # Image Generator
 class ImageGenerator:
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 4, max_retries: int = 3, retry_delay: float = 1, executor=None,
+                 cache: DiskCache = None, use_cache: bool = True, workdir: str = ".", usage: ReelUsage = None):
         self.generated_images = []
-    
-    def generate_images(self, scenes: List[Scene]):
-        for idx, scene in enumerate(scenes):
-            print("Generating image for Scene", idx)
-            url = generate_image(scene.image_prompt)
-            self.generated_images.append((scene.scene_number, url))
-
-    def download_images(self):
-        for scene_number, url in self.generated_images:
-            print("Downloading image for Scene", scene_number)
-            download_image(url, f"image{scene_number}")
+        self.usage = usage
+        self.image_dir = os.path.join(workdir, "images")
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.executor = executor
+        self.cache = cache or DiskCache(namespace="images")
+        self.use_cache = use_cache
+
+    async def generate_images(self, scenes: List[Scene]):
+        """
+        Generate and download every scene's image, starting each download as soon as its URL is ready
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self._generate_and_download(scene, semaphore) for scene in scenes))
+        self.generated_images = sorted(results, key=lambda result: result[0])
+        if self.use_cache:
+            print("Image cache:", self.cache.stats())
+
+    def _cache_key(self, prompt: str) -> str:
+        return DiskCache.make_key(IMAGE_MODEL, IMAGE_SIZE, hash_text(prompt))
+
+    def _restore_from_cache(self, scene: Scene):
+        """
+        Copy a cached image into the image directory, returning its path or None on a miss
+        """
+        key = self._cache_key(scene.image_prompt)
+        cached_path = self.cache.get_path(key)
+        if cached_path is None:
+            return None
+        meta = self.cache.get_meta(key) or {}
+        os.makedirs(self.image_dir, exist_ok=True)
+        image_path = os.path.join(self.image_dir, f"image{scene.scene_number}{meta.get('extension', '.png')}")
+        shutil.copyfile(cached_path, image_path)
+        return image_path
+
+    def _store_in_cache(self, scene: Scene, image_path: str):
+        extension = os.path.splitext(image_path)[1]
+        self.cache.put_file(self._cache_key(scene.image_prompt), image_path, meta={"extension": extension})
+
+    async def _generate_and_download(self, scene: Scene, semaphore: asyncio.Semaphore):
+        with tracer.span("image.scene", category="scene", scene=scene.scene_number) as span:
+            image_path = await self._process_scene(scene, semaphore, span)
+        return scene.scene_number, image_path
+
+    async def _process_scene(self, scene: Scene, semaphore: asyncio.Semaphore, span: dict):
+        loop = asyncio.get_running_loop()
+        span["cached"] = False
+        span["retries"] = 0
+
+        if self.use_cache:
+            image_path = await loop.run_in_executor(self.executor, self._restore_from_cache, scene)
+            if image_path:
+                print(f"Using cached image for Scene {scene.scene_number}")
+                span["cached"] = True
+                return image_path
+
+        async with semaphore:
+            print("Generating image for Scene", scene.scene_number)
+            url = await loop.run_in_executor(self.executor, generate_image, scene.image_prompt, self.usage)
+
+        if not url:
+            print(f"No image URL returned for Scene {scene.scene_number}")
+            return None
+
+        for attempt in range(self.max_retries):
+            span["retries"] = attempt
+            async with semaphore:
+                print(f"Downloading image for Scene {scene.scene_number} (attempt {attempt + 1})")
+                image_path = await loop.run_in_executor(
+                    self.executor, fetch_image, url, f"image{scene.scene_number}", self.image_dir)
+            if image_path:
+                span["bytes"] = os.path.getsize(image_path)
+                if self.use_cache:
+                    await loop.run_in_executor(self.executor, self._store_in_cache, scene, image_path)
+                return image_path
+            # Back off without holding a concurrency slot
+            await asyncio.sleep(backoff_delay(attempt, base=self.retry_delay))
+
+        print(f"Failed to download image for Scene {scene.scene_number} after {self.max_retries} retries.")
+        return None
 
 # Audio & Subtitle Generator
 class AudioGenerator:
+    def __init__(self, max_workers: int = TTS_WORKERS, executor=None, use_cache: bool = True, refresh_cache: bool = False,
+                 workdir: str = ".", usage: ReelUsage = None):
+        self.max_workers = max_workers
+        self.usage = usage
+        self.executor = executor
+        self.use_cache = use_cache
+        self.refresh_cache = refresh_cache
+        self.audio_dir = os.path.join(workdir, "audios")
+        self.srt_path = os.path.join(workdir, "subtitles.srt")
+        self.manifest_path = os.path.join(workdir, MANIFEST_PATH)
+
     def generate_audio_and_subtitles(self, scenes: List[Scene]):
-        generate_audio_and_subtitle([scene.dict() for scene in scenes])
+        return generate_audio_and_subtitle(
+            [scene.dict() for scene in scenes], output_srt_path=self.srt_path, max_workers=self.max_workers,
+            executor=self.executor, use_cache=self.use_cache, refresh_cache=self.refresh_cache,
+            manifest_path=self.manifest_path, audio_dir=self.audio_dir, usage=self.usage)
 
 # Video Generator
 class VideoGenerator:
-    def create_video(self):
-        preprocess_images("images", "images_processed")
-        create_video_with_audio_and_subtitles("images_processed", "audios", "output_video.mp4")
+    def __init__(self, jobs: int = RENDER_JOBS, executor=None, mode: str = RENDER_MODE, workdir: str = ".",
+                 preprocess_executor=None, profile: str = ENCODE_PROFILE, variants: List[str] = ()):
+        self.jobs = jobs
+        self.executor = executor
+        self.preprocess_executor = preprocess_executor
+        self.mode = mode
+        self.profile = profile
+        self.workdir = workdir
+        self.output_video = os.path.join(workdir, "output_video.mp4")
+        # The final video is always rendered; other variants are derived from the same master
+        self.variants = ["final"] + [variant for variant in variants if variant != "final"]
+        self.targets = variant_targets(self.variants, self.output_video, profile)
+
+    @property
+    def outputs(self) -> List[str]:
+        return [target["path"] for target in self.targets]
+
+    def create_video(self, manifest=None):
+        images_dir = os.path.join(self.workdir, "images")
+        processed_dir = os.path.join(self.workdir, "images_processed")
+        preprocess_images(images_dir, processed_dir, executor=self.preprocess_executor)
+        self.render(manifest, self.targets)
+
+    def render(self, manifest, targets):
+        """
+        Render the given output targets from the already preprocessed images
+        """
+        return render_targets(
+            os.path.join(self.workdir, "images_processed"), os.path.join(self.workdir, "audios"), targets,
+            work_dir=self.workdir, executor=self.executor, jobs=self.jobs, mode=self.mode, manifest=manifest,
+            srt_path=os.path.join(self.workdir, "subtitles.srt"))
 
 # AI Reel Generator
 class AIReelGenerator:
-    def __init__(self, url: str):
+    def __init__(self, url: str, workdir: str = ".", pools: ResourcePools = None,
+                 scene_generator: SceneGenerator = None, scraper: WebScraper = None,
+                 encode_profile: str = ENCODE_PROFILE, crawler_pool: CrawlerPool = None,
+                 priority: int = PRIORITY_INTERACTIVE, variants: List[str] = (), use_cache: bool = True,
+                 refresh_cache: bool = False):
+        os.makedirs(workdir, exist_ok=True)
         self.url = url
-        self.scraper = WebScraper(url)
-        self.scene_generator = SceneGenerator()
-        self.image_generator = ImageGenerator()
-        self.audio_generator = AudioGenerator()
-        self.video_generator = VideoGenerator()
+        # API calls, estimated spend and rate-limiter priority for this reel
+        self.usage = ReelUsage(priority)
+        self.workdir = workdir
+        self.pools = pools or ResourcePools()
+        self.article_path = os.path.join(workdir, "article.md")
+        self.scenes_path = os.path.join(workdir, "scenes.json")
+        self.scraper = scraper or WebScraper(url, crawler_pool=crawler_pool)
+        self.scene_generator = scene_generator or SceneGenerator()
+        self.image_generator = ImageGenerator(
+            max_concurrency=self.pools.image_workers, executor=self.pools.image, workdir=workdir, usage=self.usage)
+        self.audio_generator = AudioGenerator(executor=self.pools.tts, workdir=workdir, usage=self.usage,
+                                              use_cache=use_cache, refresh_cache=refresh_cache)
+        self.video_generator = VideoGenerator(
+            jobs=self.pools.ffmpeg_workers, executor=self.pools.ffmpeg, workdir=workdir,
+            preprocess_executor=self.pools.preprocess, profile=encode_profile, variants=variants)
+        self.state = JobState(os.path.join(workdir, JOB_STATE_PATH))
+        self.scene_count = 0
+
+    async def run(self, force: bool = False, streaming: bool = False):
+        """
+        Run every stage, skipping those whose inputs are unchanged since the last
+        successful run and whose outputs are still on disk. With streaming, the
+        images, audio and video stages are fused so each scene is encoded as soon
+        as its own image and narration are ready.
+        """
+        if force:
+            self.state.reset()
+
+        loop = asyncio.get_running_loop()
+        with tracer.span("reel", workdir=self.workdir, url=self.url):
+            with tracer.span("stage.scrape", workdir=self.workdir):
+                article_text = await self.scrape_stage()
+            with tracer.span("stage.scenes", workdir=self.workdir):
+                scenes = await self.scenes_stage(article_text)
+            self.scene_count = len(scenes)
+            if streaming:
+                with tracer.span("stage.streaming", workdir=self.workdir, scenes=len(scenes)):
+                    await self.streaming_stage(scenes)
+            else:
+                with tracer.span("stage.images", workdir=self.workdir, scenes=len(scenes)):
+                    await self.images_stage(scenes)
+                # The audio and video stages block on their worker pools, so keep them off the event loop
+                with tracer.span("stage.audio", workdir=self.workdir, scenes=len(scenes)):
+                    manifest = await loop.run_in_executor(None, self.audio_stage, scenes)
+                with tracer.span("stage.video", workdir=self.workdir, scenes=len(scenes)):
+                    await loop.run_in_executor(None, self.video_stage, manifest)
+        print("AI Reel generation complete!")
+        print_usage(self.usage)
+
+    async def scrape_stage(self) -> str:
+        stage_fingerprint = fingerprint("scrape", self.url)
+        if self.state.is_fresh("scrape", stage_fingerprint):
+            print("Scraping article... (up to date, skipped)")
+            with open(self.article_path, "r", encoding="utf-8") as f:
+                return f.read()
 
-    async def run(self):
         print("Scraping article...")
-        article_text = await self.scraper.scrape()
+        async with self.pools.scrape:
+            with tracer.span("scrape.fetch", category="api", url=self.url) as span:
+                article_text = await self.scraper.scrape()
+                span["bytes"] = len(article_text.encode("utf-8"))
+        with open(self.article_path, "w", encoding="utf-8") as f:
+            f.write(article_text)
+        self.state.mark_done("scrape", stage_fingerprint, [self.article_path], digest=hash_text(article_text))
+        return article_text
+
+    async def scenes_stage(self, article_text: str) -> List[Scene]:
+        stage_fingerprint = fingerprint(
+            "scenes", SceneGenerator.MODEL, hash_text(SceneGenerator.SYSTEM_PROMPT), hash_text(article_text))
+        if self.state.is_fresh("scenes", stage_fingerprint):
+            print("Generating scenes... (up to date, skipped)")
+            with open(self.scenes_path, "r", encoding="utf-8") as f:
+                return YouTubeShortsScript.model_validate_json(f.read()).scenes
+
         print("Generating scenes...")
-        scenes = await self.scene_generator.generate_scenes(article_text)
+        async with self.pools.llm:
+            with tracer.span("llm.generate_scenes", category="api", chars=len(article_text)):
+                scenes = await self.scene_generator.generate_scenes(article_text, usage=self.usage)
+        with open(self.scenes_path, "w", encoding="utf-8") as f:
+            f.write(YouTubeShortsScript(scenes=scenes).model_dump_json(indent=2))
+        self.state.mark_done("scenes", stage_fingerprint, [self.scenes_path])
+        return scenes
+
+    async def images_stage(self, scenes: List[Scene]):
+        stage_fingerprint = fingerprint(
+            "images", IMAGE_MODEL, IMAGE_SIZE, [(scene.scene_number, scene.image_prompt) for scene in scenes])
+        if self.state.is_fresh("images", stage_fingerprint):
+            print("Generating images... (up to date, skipped)")
+            return
+
         print("Generating images...")
-        self.image_generator.generate_images(scenes)
-        self.image_generator.download_images()
+        await self.image_generator.generate_images(scenes)
+        image_paths = [path for _, path in self.image_generator.generated_images]
+        if None in image_paths:
+            print("Some images failed; the images stage will be retried on the next run")
+            self.state.invalidate("images")
+            return
+        self.state.mark_done("images", stage_fingerprint, image_paths, digest=files_digest(image_paths))
+
+    def audio_stage(self, scenes: List[Scene]):
+        stage_fingerprint = fingerprint(
+            "audio", TTS_MODEL, [(scene.scene_number, scene.text) for scene in scenes])
+        # A cache refresh must re-synthesize, even when the scene text is unchanged
+        if not self.audio_generator.refresh_cache and self.state.is_fresh("audio", stage_fingerprint):
+            print("Generating audio & subtitles... (up to date, skipped)")
+            return read_manifest(self.audio_generator.manifest_path)
+
         print("Generating audio & subtitles...")
-        self.audio_generator.generate_audio_and_subtitles(scenes)
+        manifest = self.audio_generator.generate_audio_and_subtitles(scenes)
+        if not manifest or len(manifest) != len(scenes):
+            print("Some audio failed; the audio stage will be retried on the next run")
+            self.state.invalidate("audio")
+            return manifest
+        audio_paths = [entry["audio_path"] for entry in manifest]
+        srt_path = self.audio_generator.srt_path
+        self.state.mark_done(
+            "audio", stage_fingerprint, audio_paths + [srt_path, self.audio_generator.manifest_path],
+            digest=files_digest(audio_paths + [srt_path]))
+        return manifest
+
+    def video_stage(self, manifest):
+        stage_fingerprint = fingerprint(
+            "video", self.state.digest("images"), self.state.digest("audio"),
+            self.video_generator.mode, self.video_generator.profile, self.video_generator.variants,
+            video_settings.ADD_SUBTITLES, video_settings.SUBTITLE_MODE)
+        if self.state.is_fresh("video", stage_fingerprint):
+            print("Creating video... (up to date, skipped)")
+            return
+
         print("Creating video...")
-        self.video_generator.create_video()
-        print("AI Reel generation complete!")
+        started = time.time()
+        self.video_generator.create_video(manifest)
+        outputs = self.video_generator.outputs
+        if all(os.path.exists(output) and os.path.getmtime(output) >= started for output in outputs):
+            self.state.mark_done("video", stage_fingerprint, outputs)
+
+    async def streaming_stage(self, scenes: List[Scene]):
+        """
+        Hand each scene to the encoder as soon as both its image and its audio
+        are ready, overlapping API calls with x264 work; the SRT, manifest and
+        final concat are written once the last scene lands, and any other
+        output variants are derived from the concatenated video
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.image_generator.max_concurrency)
+        processed_dir = os.path.join(self.workdir, "images_processed")
+        os.makedirs(processed_dir, exist_ok=True)
+        items = [scene.dict() for scene in scenes]
+
+        # This run rewrites the outputs of the staged images/audio/video steps
+        for stage in ("images", "audio", "video"):
+            self.state.invalidate(stage)
+
+        # Keep preprocess_images()' keys in step with the stills written here: forget
+        # these scenes up front and record each one once its still is replaced, so a
+        # later staged run never trusts a key for an image this run overwrote
+        preprocess_keys = read_preprocess_keys(processed_dir)
+        for scene in scenes:
+            preprocess_keys.pop(f"image{scene.scene_number}.jpg", None)
+        write_preprocess_keys(processed_dir, preprocess_keys)
+
+        async def render(scene: Scene, item: dict):
+            with tracer.span("streaming.scene", category="scene", scene=scene.scene_number):
+                image_task = asyncio.ensure_future(self.image_generator._generate_and_download(scene, semaphore))
+                duration = await loop.run_in_executor(self.pools.tts, functools.partial(
+                    synthesize_scene_audio, item, use_cache=self.audio_generator.use_cache,
+                    refresh_cache=self.audio_generator.refresh_cache, audio_dir=self.audio_generator.audio_dir,
+                    usage=self.usage))
+                _, image_path = await image_task
+                if not image_path or not duration:
+                    print(f"Scene {scene.scene_number} is missing its image or audio; skipping")
+                    return duration, None
+
+                processed_path = os.path.join(processed_dir, f"image{scene.scene_number}.jpg")
+                preprocess_keys[os.path.basename(processed_path)] = await loop.run_in_executor(
+                    self.pools.preprocess, preprocess_keyed_image, image_path, processed_path)
+                audio_path = os.path.join(self.audio_generator.audio_dir, f"scene{scene.scene_number}.mp3")
+                prepared = prepare_scene(
+                    scene.scene_number, processed_path, audio_path, duration, scene.text.replace('\n', ' '))
+                segment = await loop.run_in_executor(
+                    self.pools.ffmpeg, render_scene_segment, prepared, self.workdir, self.video_generator.profile)
+                return duration, segment
+
+        results = await asyncio.gather(*(render(scene, item) for scene, item in zip(scenes, items)),
+                                       return_exceptions=True)
+        write_preprocess_keys(processed_dir, preprocess_keys)
+
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            for failure in failures:
+                print(f"FFmpeg Error: {failure}")
+            raise Exception(f"{len(failures)} scene(s) failed to render")
+
+        # Keep the subtitles aligned with the video: a scene without a segment gets no cue
+        durations = [duration if segment else None for duration, segment in results]
+        segments = [segment for _, segment in results if segment]
+        await loop.run_in_executor(None, functools.partial(
+            write_subtitles_and_manifest, items, durations, self.audio_generator.srt_path,
+            self.audio_generator.manifest_path, self.audio_generator.audio_dir))
+
+        output_video = self.video_generator.output_video
+        concat_list_path = os.path.join(self.workdir, "concat_list.txt")
+        await loop.run_in_executor(self.pools.ffmpeg, concat_scenes, segments, concat_list_path, output_video)
+        print("Video created successfully!")
+
+        for temp_file in segments + [concat_list_path]:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+        # Variants with the same subtitles are transcoded from the concatenated
+        # video; the rest need their own master render
+        variants = [target for target in self.video_generator.targets if target["path"] != output_video]
+        derived = [target for target in variants if target["subtitles"] == video_settings.ADD_SUBTITLES]
+        others = [target for target in variants if target not in derived]
+        if derived:
+            await loop.run_in_executor(
+                self.pools.ffmpeg, fan_out, output_video, derived, self.video_generator.profile)
+        if others:
+            manifest = read_manifest(self.audio_generator.manifest_path)
+            await loop.run_in_executor(None, self.video_generator.render, manifest, others)
+
+# Batch Runner
+def job_workspace(output_root: str, index: int, url: str) -> str:
+    """
+    Build an isolated workspace directory name for a batch job
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", url.rstrip("/").rsplit("/", 1)[-1]).strip("-")[:60]
+    return os.path.join(output_root, f"{index:03d}-{slug or 'reel'}")
+
+
+async def run_batch(urls: List[str], output_root: str = "jobs", pools: ResourcePools = None, force: bool = False,
+                    streaming: bool = False, encode_profile: str = ENCODE_PROFILE, crawler_pool: CrawlerPool = None,
+                    priority: int = PRIORITY_BATCH, variants: List[str] = (), use_cache: bool = True,
+                    refresh_cache: bool = False):
+    """
+    Generate one reel per URL, each in its own workspace, sharing a single set
+    of worker pools and one pool of warm crawler browsers. Batch reels default
+    to PRIORITY_BATCH, so interactive work in the same process is served first.
+    """
+    pools = pools or ResourcePools()
+    crawler_pool = crawler_pool or CrawlerPool(pages_per_browser=pools.scrape_workers)
+    scene_generator = SceneGenerator()
+
+    async def run_job(index: int, url: str):
+        workdir = job_workspace(output_root, index, url)
+        generator = AIReelGenerator(url, workdir=workdir, pools=pools, scene_generator=scene_generator,
+                                    encode_profile=encode_profile, crawler_pool=crawler_pool, priority=priority,
+                                    variants=variants, use_cache=use_cache, refresh_cache=refresh_cache)
+        started = time.perf_counter()
+        error = None
+        try:
+            await generator.run(force=force, streaming=streaming)
+        except Exception as e:
+            error = str(e)
+            print(f"Job {index} ({url}) failed: {e}")
+        output_video = generator.video_generator.output_video
+        return {
+            "url": url,
+            "workdir": workdir,
+            "scenes": generator.scene_count,
+            "seconds": time.perf_counter() - started,
+            "ok": error is None and os.path.exists(output_video),
+            "error": error,
+            "cost": generator.usage.cost,
+        }
+
+    try:
+        return await asyncio.gather(*(run_job(index, url) for index, url in enumerate(urls, 1)))
+    finally:
+        await crawler_pool.close()
+        print_crawler_stats(crawler_pool)
+        pools.shutdown()
+
+
+# Service
+QUEUE_POLL_INTERVAL = 5
+
+
+async def serve(queue: JobQueue, pools: ResourcePools, crawler_pool: CrawlerPool, output_root: str = "jobs",
+                max_jobs: int = 2, host: str = "127.0.0.1", port: int = 8080):
+    """
+    Run until interrupted, generating reels from the job queue with at most
+    max_jobs in flight. The scene generator, worker pools, HTTP session and
+    crawler browsers stay warm across jobs; new jobs arrive over the HTTP API
+    or from any other process writing to the same queue file.
+    """
+    loop = asyncio.get_running_loop()
+    scene_generator = SceneGenerator()
+    wake = asyncio.Event()
+    running = {}
+
+    requeued = queue.requeue_running()
+    if requeued:
+        print(f"Re-queued {requeued} job(s) interrupted by the last shutdown")
+
+    async def loop_status():
+        # running and the crawler pool are only changed on the event loop, so read them there
+        return {
+            "running": [{"id": job_id, "url": url} for job_id, url in sorted(running.items())],
+            "crawler": {key: value for key, value in crawler_pool.stats().items() if key != "latencies"},
+        }
+
+    def status():
+        # Called on the HTTP server thread
+        snapshot = asyncio.run_coroutine_threadsafe(loop_status(), loop).result(timeout=10)
+        return {
+            "queue": queue.depth(),
+            "running": snapshot["running"],
+            "limits": {
+                "jobs": max_jobs, "scrape": pools.scrape_workers, "image": pools.image_workers,
+                "tts": pools.tts_workers, "ffmpeg": pools.ffmpeg_workers,
+            },
+            "crawler": snapshot["crawler"],
+            "rate_limits": limiter_stats(),
+        }
+
+    async def run_job(job: dict):
+        options = job["options"]
+        workdir = job_workspace(output_root, job["id"], job["url"])
+        queue.start(job["id"], workdir)
+        running[job["id"]] = job["url"]
+        generator = None
+        error = None
+        try:
+            # Inside the try: a job with bad options must fail on its own, not take the worker down
+            generator = AIReelGenerator(
+                job["url"], workdir=workdir, pools=pools, scene_generator=scene_generator,
+                encode_profile=options.get("encode_profile", ENCODE_PROFILE), crawler_pool=crawler_pool,
+                priority=job["priority"], variants=options.get("variants", ()),
+                use_cache=not options.get("no_cache", False), refresh_cache=options.get("refresh_cache", False))
+            await generator.run(force=options.get("force", False), streaming=options.get("streaming", False))
+            if not os.path.exists(generator.video_generator.output_video):
+                error = "no video was produced"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            running.pop(job["id"], None)
+        queue.finish(job["id"], error, usage=generator.usage.summary() if generator else None)
+        print(f"Job {job['id']} ({job['url']}) {'failed: ' + error if error else 'done'}")
+
+    async def worker():
+        while True:
+            # Clear before claiming so a job enqueued in between still wakes us
+            wake.clear()
+            job = queue.claim()
+            if job is None:
+                try:
+                    await asyncio.wait_for(wake.wait(), QUEUE_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await run_job(job)
+
+    server, base_url = start_service_server(
+        queue, status, lambda: loop.call_soon_threadsafe(wake.set), host, port)
+    print(f"Reel service on {base_url} (queue: {queue.path}, {max_jobs} concurrent jobs)")
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, max_jobs))))
+    finally:
+        server.shutdown()
+        await crawler_pool.close()
+        pools.shutdown()
+        queue.close()
+
+
+def print_batch_summary(results, elapsed: float):
+    print(f"\n{'job':<40} {'status':<7} {'scenes':>6} {'seconds':>8} {'cost ($)':>9}")
+    for result in results:
+        status = "ok" if result["ok"] else "failed"
+        print(f"{os.path.basename(result['workdir']):<40} {status:<7} {result['scenes']:>6} {result['seconds']:>8.1f} "
+              f"{result['cost']:>9.3f}")
+
+    succeeded = [result for result in results if result["ok"]]
+    scenes = sum(result["scenes"] for result in succeeded)
+    print(f"\n{len(succeeded)}/{len(results)} reels in {elapsed:.1f}s "
+          f"({len(succeeded) / elapsed * 60:.2f} reels/min, {scenes / elapsed * 60:.1f} scenes/min), "
+          f"estimated spend ${sum(result['cost'] for result in results):.2f}")
+    print_pool_stats()
+
+
+def print_usage(usage: ReelUsage):
+    summary = usage.summary()
+    for provider, entry in sorted(summary["providers"].items()):
+        print(f"  {provider:<14} {entry['calls']:>4} calls {entry['errors']:>3} failed "
+              f"{entry['units']:>8} units  ${entry['cost']:.3f}")
+    print(f"Estimated API spend: ${summary['cost']:.3f}")
+
+
+def print_crawler_stats(crawler_pool: CrawlerPool):
+    stats = crawler_pool.stats()
+    print(f"Crawler: {stats['pages']} pages, {stats['launched']} browsers launched, {stats['recycled']} recycled")
+    for url, seconds in sorted(stats["latencies"].items(), key=lambda item: -item[1]):
+        print(f"  {seconds:>7.2f}s  {url}")
+
+
+def print_pool_stats():
+    stats = pool_stats()
+    print(f"HTTP: {stats['requests']} requests, {stats['retries']} retries, {stats['errors']} connection errors")
+    for host in stats["hosts"]:
+        print(f"  {host['host']:<40} {host['connections_opened']:>4} connections {host['requests']:>6} requests")
+    for provider, limiter in limiter_stats().items():
+        print(f"  {provider:<40} {limiter['rate']:>6.2f} req/s {limiter['throttled']:>4} throttled "
+              f"{limiter['wait_seconds']:>8.1f}s waiting")
+
+
+def read_url_file(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def write_trace(prefix: str):
+    tracer.write_jsonl(f"{prefix}.jsonl")
+    tracer.write_chrome_trace(f"{prefix}.trace.json")
+    print(f"Trace written to {prefix}.jsonl and {prefix}.trace.json")
+    for name, total in sorted(tracer.summary().items(), key=lambda item: -item[1]["seconds"]):
+        print(f"  {name:<24} {total['count']:>5} calls {total['seconds']:>10.2f}s")
+    print_pool_stats()
+
+
+async def main(args):
+    config.check_api_keys()
+    # Spans are only kept when they will be written out; a long-running service would otherwise accumulate them
+    tracer.enabled = bool(args.trace)
+    pools = ResourcePools(
+        scrape_workers=args.scrape_workers, llm_workers=args.llm_workers, image_workers=args.image_workers,
+        tts_workers=args.tts_workers, ffmpeg_workers=args.ffmpeg_workers,
+        preprocess_workers=args.preprocess_workers)
+
+    crawler_pool = CrawlerPool(
+        browsers=args.browsers, pages_per_browser=args.pages_per_browser or args.scrape_workers,
+        recycle_after=args.recycle_after)
+
+    if args.serve:
+        await serve(JobQueue(args.queue), pools, crawler_pool, output_root=args.output_root,
+                    max_jobs=args.max_jobs, host=args.host, port=args.port)
+        return
+
+    if args.batch:
+        started = time.perf_counter()
+        results = await run_batch(read_url_file(args.batch), args.output_root, pools, force=args.force,
+                                  streaming=args.streaming, encode_profile=args.encode_profile,
+                                  crawler_pool=crawler_pool, priority=PRIORITIES[args.priority or "batch"],
+                                  variants=args.variants, use_cache=not args.no_cache,
+                                  refresh_cache=args.refresh_cache)
+        print_batch_summary(results, time.perf_counter() - started)
+        return
+
+    generator = AIReelGenerator(args.url, workdir=args.workdir, pools=pools, encode_profile=args.encode_profile,
+                                priority=PRIORITIES[args.priority or "interactive"], variants=args.variants,
+                                use_cache=not args.no_cache, refresh_cache=args.refresh_cache)
+    try:
+        await generator.run(force=args.force, streaming=args.streaming)
+    finally:
+        pools.shutdown()
+
 
 # Run
 if __name__ == "__main__":
-    url = 'https://www.bbc.com/news/articles/c0mw221z2yyo'
+    parser = argparse.ArgumentParser(description="Generate a short-form video reel from a news article.")
+    parser.add_argument("url", nargs="?", default='https://www.bbc.com/news/articles/c0mw221z2yyo')
     # url = 'https://www.bbc.com/future/article/20250122-expert-tips-on-how-to-keep-exercising-during-cold-winter-weather'
-    generator = AIReelGenerator(url)
-    asyncio.run(generator.run())
\ No newline at end of file
+    parser.add_argument("--workdir", default=".", help="directory for a single reel's files")
+    parser.add_argument("--batch", help="file with one article URL per line")
+    parser.add_argument("--output-root", default="jobs", help="parent directory for batch job workspaces")
+    parser.add_argument("--serve", action="store_true", help="run as a service that takes jobs over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="service listen address")
+    parser.add_argument("--port", type=int, default=8080, help="service listen port")
+    parser.add_argument("--queue", default=QUEUE_PATH, help="SQLite job queue used by the service")
+    parser.add_argument("--max-jobs", type=int, default=2, help="reels the service generates at once")
+    parser.add_argument("--priority", choices=sorted(PRIORITIES),
+                        help="rate-limiter priority of API calls (default: interactive, or batch with --batch)")
+    parser.add_argument("--force", action="store_true", help="ignore saved job state and re-run every stage")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the narration (TTS) cache")
+    parser.add_argument("--refresh-cache", action="store_true",
+                        help="re-synthesize all narration and overwrite its cache entries")
+    parser.add_argument("--streaming", action="store_true",
+                        help="encode each scene as soon as its image and audio are ready")
+    parser.add_argument("--encode-profile", choices=sorted(ENCODE_PROFILES), default=ENCODE_PROFILE,
+                        help="x264 settings: still (default), draft (fast previews) or final (best quality)")
+    parser.add_argument("--variants", nargs="+", choices=[variant for variant in OUTPUT_VARIANTS if variant != "final"],
+                        default=[], help="extra outputs derived from the same render: 720x1280 preview, "
+                                         "muted (no audio) or clean (no subtitles)")
+    parser.add_argument("--scrape-workers", type=int, default=4)
+    parser.add_argument("--browsers", type=int, default=1, help="warm crawler browsers kept for a batch")
+    parser.add_argument("--pages-per-browser", type=int, help="concurrent pages per browser (default: --scrape-workers)")
+    parser.add_argument("--recycle-after", type=int, default=50, help="restart a browser after this many pages")
+    parser.add_argument("--llm-workers", type=int, default=4)
+    parser.add_argument("--image-workers", type=int, default=8)
+    parser.add_argument("--tts-workers", type=int, default=TTS_WORKERS)
+    parser.add_argument("--ffmpeg-workers", type=int, default=RENDER_JOBS)
+    parser.add_argument("--preprocess-workers", type=int, default=PREPROCESS_WORKERS)
+    parser.add_argument("--trace", nargs="?", const="reel_trace", metavar="PREFIX",
+                        help="write stage/scene timings to PREFIX.jsonl and a Chrome trace to PREFIX.trace.json")
+    parser.add_argument("--profile", nargs="?", const="reel.prof", metavar="PATH",
+                        help="run under cProfile and save the stats to PATH")
+    args = parser.parse_args()
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        asyncio.run(main(args))
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+            print(f"Profile written to {args.profile}")
+        if args.trace:
+            write_trace(args.trace)
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Measure peak Python memory while many image downloads are in flight, comparing
+the streamed fetch_image against buffering each body with response.content.
+
+Runs against the local stub server, so no network access or API keys are
+needed. Peak memory is measured with tracemalloc.
+
+    python benchmarks/bench_downloads.py --concurrent 16 --downloads 64
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_server import StubConfig, start_stub_server  # noqa: E402
+from utils import http_client  # noqa: E402
+from utils.image_downloader import fetch_image  # noqa: E402
+
+
+def buffered_fetch(url, filename, output_dir):
+    """
+    The previous download path: read the whole body into memory, then write it
+    """
+    response = http_client.request("GET", url, max_retries=0)
+    image_path = os.path.join(output_dir, f"{filename}.png")
+    with open(image_path, "wb") as f:
+        f.write(response.content)
+    return image_path
+
+
+def measure(fetch, base_url, output_dir, downloads, concurrent):
+    """
+    Run the downloads, returning (wall seconds, peak traced bytes)
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrent) as pool:
+        paths = list(pool.map(
+            lambda i: fetch(f"{base_url}/files/image{i}.png", f"image{i}", output_dir), range(downloads)))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if None in paths:
+        raise RuntimeError(f"{paths.count(None)} download(s) failed")
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--downloads", type=int, default=64)
+    parser.add_argument("--concurrent", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub server latency before each body")
+    args = parser.parse_args()
+
+    # 1024x1792 noise PNGs, about the size of a real generated image
+    config = StubConfig(download_latency=args.latency, jitter=0.0)
+    server, base_url = start_stub_server(config)
+    image_mb = len(config.png) / 1e6
+    print(f"{args.downloads} downloads of {image_mb:.1f} MB, {args.concurrent} in flight")
+
+    workdir = tempfile.mkdtemp(prefix="reel_bench_downloads_")
+    try:
+        print(f"\n{'mode':<9} {'wall (s)':>9} {'MB/s':>8} {'peak (MB)':>10} {'per transfer (MB)':>18}")
+        for name, fetch in (("buffered", buffered_fetch), ("streamed", fetch_image)):
+            output_dir = os.path.join(workdir, name)
+            os.makedirs(output_dir)
+            elapsed, peak = measure(fetch, base_url, output_dir, args.downloads, args.concurrent)
+            print(f"{name:<9} {elapsed:>9.2f} {image_mb * args.downloads / elapsed:>8.1f} "
+                  f"{peak / 1e6:>10.1f} {peak / 1e6 / args.concurrent:>18.2f}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare the x264 encode profiles ("still", "draft", "final") by encode
+throughput and output bitrate on the same synthetic scenes. Requires ffmpeg
+on PATH.
+
+    python benchmarks/bench_encode_profiles.py --scenes 6 --duration 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_render_modes import make_inputs  # noqa: E402
+from utils import video_generator  # noqa: E402
+
+
+def render(workdir, profile, render_mode):
+    """
+    Render once with the given profile, returning (wall seconds, output bytes)
+    """
+    output = os.path.join(workdir, f"output_{profile}.mp4")
+    started = time.perf_counter()
+    video_generator.create_video_with_audio_and_subtitles(
+        os.path.join(workdir, "images_processed"), os.path.join(workdir, "audios"), output,
+        mode=render_mode, srt_path=os.path.join(workdir, "subtitles.srt"), work_dir=workdir, profile=profile,
+        use_cache=False)
+    elapsed = time.perf_counter() - started
+    if not os.path.exists(output):
+        raise RuntimeError(f"{profile} render did not produce {output}")
+    size = os.path.getsize(output)
+    os.remove(output)
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenes", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=8.0, help="seconds of narration per scene")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render-mode", default="segments", choices=["segments", "single_pass"])
+    parser.add_argument("--profiles", nargs="+", default=list(video_generator.ENCODE_PROFILES),
+                        choices=list(video_generator.ENCODE_PROFILES))
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        sys.exit("ffmpeg is required for this benchmark")
+
+    workdir = tempfile.mkdtemp(prefix="reel_bench_profiles_")
+    try:
+        make_inputs(workdir, args.scenes, args.duration)
+        seconds = args.scenes * args.duration
+        frames = seconds * video_generator.FRAME_RATE
+        results = {}
+        for profile in args.profiles:
+            runs = [render(workdir, profile, args.render_mode) for _ in range(args.repeat)]
+            results[profile] = (min(elapsed for elapsed, _ in runs), runs[-1][1])
+
+        print(f"\n{'profile':<8} {'best (s)':>9} {'fps':>8} {'size (MB)':>10} {'kbit/s':>9}")
+        for profile, (elapsed, size) in results.items():
+            print(f"{profile:<8} {elapsed:>9.2f} {frames / elapsed:>8.1f} "
+                  f"{size / 1e6:>10.2f} {size * 8 / seconds / 1000:>9.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
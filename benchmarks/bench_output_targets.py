@@ -0,0 +1,99 @@
+"""
+Compare rendering every output variant (final, preview, muted, clean) with
+one master render per subtitle setting plus a single fan-out transcode,
+against one full render per variant. Requires ffmpeg on PATH.
+
+    python benchmarks/bench_output_targets.py --scenes 6 --duration 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_render_modes import make_inputs  # noqa: E402
+from utils import video_generator  # noqa: E402
+
+
+def remove_outputs(targets):
+    for target in targets:
+        if os.path.exists(target["path"]):
+            os.remove(target["path"])
+
+
+def separate(workdir, targets, render_mode):
+    """
+    The previous way: a complete render for each variant
+    """
+    for target in targets:
+        video_generator.create_video_with_audio_and_subtitles(
+            os.path.join(workdir, "images_processed"), os.path.join(workdir, "audios"), target["path"],
+            mode=render_mode, srt_path=os.path.join(workdir, "subtitles.srt"), work_dir=workdir,
+            profile=target["profile"], use_cache=False, add_subtitles=target["subtitles"])
+        if target["audio"] and (target["width"], target["height"]) == (video_generator.VIDEO_WIDTH,
+                                                                          video_generator.VIDEO_HEIGHT):
+            continue
+        # Scaling and muting still need a transcode of the rendered video
+        rendered = target["path"] + ".full.mp4"
+        os.replace(target["path"], rendered)
+        video_generator.fan_out(rendered, [target], target["profile"])
+        os.remove(rendered)
+
+
+def fanned_out(workdir, targets, render_mode):
+    video_generator.render_targets(
+        os.path.join(workdir, "images_processed"), os.path.join(workdir, "audios"), targets, work_dir=workdir,
+        mode=render_mode, srt_path=os.path.join(workdir, "subtitles.srt"), use_cache=False)
+
+
+def render(workdir, strategy, targets, render_mode):
+    """
+    Produce every target once, returning wall seconds
+    """
+    started = time.perf_counter()
+    strategy(workdir, targets, render_mode)
+    elapsed = time.perf_counter() - started
+    missing = [target["name"] for target in targets if not os.path.exists(target["path"])]
+    if missing:
+        raise RuntimeError(f"{strategy.__name__} did not produce {', '.join(missing)}")
+    remove_outputs(targets)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenes", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=8.0, help="seconds of narration per scene")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render-mode", default="segments", choices=["segments", "single_pass"])
+    parser.add_argument("--profile", default=video_generator.ENCODE_PROFILE, choices=list(video_generator.ENCODE_PROFILES))
+    parser.add_argument("--variants", nargs="+", default=list(video_generator.OUTPUT_VARIANTS),
+                        choices=list(video_generator.OUTPUT_VARIANTS))
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        sys.exit("ffmpeg is required for this benchmark")
+
+    workdir = tempfile.mkdtemp(prefix="reel_bench_targets_")
+    try:
+        make_inputs(workdir, args.scenes, args.duration)
+        targets = video_generator.variant_targets(
+            args.variants, os.path.join(workdir, "output.mp4"), args.profile)
+        results = {}
+        for name, strategy in (("separate", separate), ("fan-out", fanned_out)):
+            results[name] = min(render(workdir, strategy, targets, args.render_mode) for _ in range(args.repeat))
+
+        print(f"\n{len(targets)} outputs ({', '.join(args.variants)}) from {args.scenes} scenes")
+        print(f"{'strategy':<9} {'best (s)':>9} {'per output (s)':>15} {'speedup':>8}")
+        for name, elapsed in results.items():
+            print(f"{name:<9} {elapsed:>9.2f} {elapsed / len(targets):>15.2f} {results['separate'] / elapsed:>7.2f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+End-to-end reel benchmark against local stand-ins for OpenAI, Deepgram and
+the crawler; no API keys or network access needed.
+
+Measures per-stage latency, scaling with scene count and concurrent reel
+throughput, and checks the results against benchmarks/thresholds.json
+(exits non-zero on a regression). The video stage needs ffmpeg and is
+skipped automatically when it is not installed.
+
+    python benchmarks/bench_pipeline.py --scene-counts 4 8 16 --concurrent 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeSceneGenerator, FakeWebScraper  # noqa: E402
+from stub_server import StubConfig, start_stub_server  # noqa: E402
+
+STAGES = ["stage.scrape", "stage.scenes", "stage.images", "stage.audio", "stage.video"]
+
+
+def configure_environment(base_url):
+    """
+    Point the API clients at the stub server; must run before the pipeline is imported
+    """
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    os.environ["DEEPGRAM_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub-openai-key")
+    os.environ.setdefault("DEEPGRAM_API_KEY", "stub-deepgram-key")
+    os.environ["REEL_CACHE_DIR"] = tempfile.mkdtemp(prefix="reel_bench_cache_")
+
+
+def make_generator(workdir, scene_count, pools, args, render_video):
+    from ai_reel_generator import AIReelGenerator
+
+    url = "https://example.com/news/winter-exercise"
+    generator = AIReelGenerator(
+        url, workdir=workdir, pools=pools,
+        scene_generator=FakeSceneGenerator(scene_count, latency=args.llm_latency),
+        scraper=FakeWebScraper(url, latency=args.scrape_latency))
+    # Always measure real generation, never cache hits
+    generator.image_generator.use_cache = False
+    generator.audio_generator.use_cache = False
+    if not render_video:
+        generator.video_stage = lambda manifest: None
+    return generator
+
+
+async def run_reels(count, scene_count, args, render_video):
+    from utils.pools import ResourcePools
+
+    pools = ResourcePools(image_workers=args.image_workers, tts_workers=args.tts_workers)
+    root = tempfile.mkdtemp(prefix="reel_bench_")
+    try:
+        generators = [
+            make_generator(os.path.join(root, f"job{i}"), scene_count, pools, args, render_video)
+            for i in range(count)
+        ]
+        await asyncio.gather(*(generator.run(force=True) for generator in generators))
+    finally:
+        pools.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def measure(count, scene_count, args, render_video):
+    from utils.instrumentation import tracer
+    from utils import rate_limit
+
+    tracer.reset()
+    # Start every measurement from the configured limits, not the state a previous run left behind
+    rate_limit.reset_limiters()
+    for provider, rate in (("openai.images", args.image_rate), ("deepgram.tts", args.tts_rate)):
+        if rate:
+            rate_limit.configure_limiter(provider, rate=rate)
+    started = time.perf_counter()
+    asyncio.run(run_reels(count, scene_count, args, render_video))
+    elapsed = time.perf_counter() - started
+    summary = tracer.summary()
+    stage_seconds = {
+        name: summary[name]["seconds"] / summary[name]["count"]
+        for name in STAGES + ["reel"] if name in summary
+    }
+    return elapsed, stage_seconds
+
+
+def check_thresholds(path, results):
+    with open(path, "r", encoding="utf-8") as f:
+        thresholds = json.load(f)
+
+    failures = []
+    reference = results.get(thresholds["scenes"])
+    if reference is None:
+        print(f"No run with {thresholds['scenes']} scenes; skipping threshold checks")
+        return failures
+
+    for name, limit in thresholds.get("max_seconds", {}).items():
+        value = reference["stages"].get(name)
+        if value is not None and value > limit:
+            failures.append(f"{name}: {value:.2f}s > {limit:.2f}s")
+
+    minimum = thresholds.get("min_reels_per_minute")
+    throughput = results.get("throughput")
+    if minimum and throughput is not None and throughput < minimum:
+        failures.append(f"throughput: {throughput:.2f} reels/min < {minimum:.2f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scene-counts", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--concurrent", type=int, default=4, help="reels run at once for the throughput test")
+    parser.add_argument("--image-latency", type=float, default=2.0)
+    parser.add_argument("--download-latency", type=float, default=0.2)
+    parser.add_argument("--tts-latency", type=float, default=0.5)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--scrape-latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--image-workers", type=int, default=8)
+    parser.add_argument("--tts-workers", type=int, default=8)
+    parser.add_argument("--image-rate", type=float, help="image requests/s limit (default: the configured limit)")
+    parser.add_argument("--tts-rate", type=float, help="TTS requests/s limit (default: the configured limit)")
+    parser.add_argument("--skip-video", action="store_true")
+    parser.add_argument("--thresholds", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json"))
+    args = parser.parse_args()
+
+    config = StubConfig(args.image_latency, args.download_latency, args.tts_latency, error_rate=args.error_rate)
+    server, base_url = start_stub_server(config)
+    configure_environment(base_url)
+
+    render_video = not args.skip_video and shutil.which("ffmpeg") is not None
+    if not render_video:
+        print("Video stage skipped (ffmpeg not found or --skip-video)")
+
+    results = {}
+    print(f"\n{'scenes':>6} {'total (s)':>10} " + " ".join(f"{name[6:]:>8}" for name in STAGES))
+    for scene_count in args.scene_counts:
+        elapsed, stages = measure(1, scene_count, args, render_video)
+        results[scene_count] = {"seconds": elapsed, "stages": stages}
+        print(f"{scene_count:>6} {elapsed:>10.2f} " + " ".join(f"{stages.get(name, 0):>8.2f}" for name in STAGES))
+
+    scene_count = max(args.scene_counts)
+    elapsed, _ = measure(args.concurrent, scene_count, args, render_video)
+    results["throughput"] = args.concurrent / elapsed * 60
+    print(f"\n{args.concurrent} concurrent reels of {scene_count} scenes in {elapsed:.2f}s "
+          f"({results['throughput']:.2f} reels/min)")
+    print(f"Stub requests: {config.requests}")
+    server.shutdown()
+
+    failures = check_thresholds(args.thresholds, results)
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll thresholds met")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compare the "segments" and "single_pass" render modes of
+create_video_with_audio_and_subtitles on synthetic scenes.
+
+Reports wall time and peak disk usage of the working directory (temp scene
+files, concat list and output) for each mode. Requires ffmpeg on PATH.
+
+    python benchmarks/bench_render_modes.py --scenes 8 --duration 6
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.subtitles_generator import format_time  # noqa: E402
+from utils.video_generator import create_video_with_audio_and_subtitles  # noqa: E402
+
+SAMPLE_TEXT = "Scientists say the new findings could change how we think about winter exercise"
+
+
+def make_inputs(workdir, scenes, duration, text=SAMPLE_TEXT):
+    """
+    Create processed images, narration MP3s and a subtitles.srt in workdir
+    """
+    images_dir = os.path.join(workdir, "images_processed")
+    audio_dir = os.path.join(workdir, "audios")
+    os.makedirs(images_dir)
+    os.makedirs(audio_dir)
+
+    srt_lines = []
+    for i in range(1, scenes + 1):
+        subprocess.run([
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "lavfi", "-i", "testsrc2=size=1080x1920",
+            "-frames:v", "1",
+            os.path.join(images_dir, f"image{i}.jpg")
+        ], check=True)
+        subprocess.run([
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "lavfi", "-i", f"sine=frequency={220 * i}:duration={duration}",
+            "-c:a", "libmp3lame", "-b:a", "128k",
+            os.path.join(audio_dir, f"scene{i}.mp3")
+        ], check=True)
+        srt_lines += [
+            str(i),
+            f"{format_time((i - 1) * duration)} --> {format_time(i * duration)}",
+            text,
+            "",
+        ]
+
+    with open(os.path.join(workdir, "subtitles.srt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(srt_lines))
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def measure(mode, workdir, interval=0.05):
+    """
+    Render once in the given mode, returning (wall seconds, peak bytes written)
+    """
+    baseline = directory_size(workdir)
+    peak = [0]
+    done = threading.Event()
+
+    def poll():
+        while not done.is_set():
+            peak[0] = max(peak[0], directory_size(workdir) - baseline)
+            time.sleep(interval)
+
+    poller = threading.Thread(target=poll, daemon=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        poller.start()
+        start = time.perf_counter()
+        create_video_with_audio_and_subtitles(
+            "images_processed", "audios", "output_video.mp4", mode=mode, use_cache=False)
+        elapsed = time.perf_counter() - start
+    finally:
+        done.set()
+        poller.join()
+        os.chdir(cwd)
+
+    peak[0] = max(peak[0], directory_size(workdir) - baseline)
+    output = os.path.join(workdir, "output_video.mp4")
+    if not os.path.exists(output):
+        raise RuntimeError(f"{mode} render did not produce {output}")
+    os.remove(output)
+    return elapsed, peak[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenes", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=6.0, help="seconds of narration per scene")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        sys.exit("ffmpeg is required for this benchmark")
+
+    workdir = tempfile.mkdtemp(prefix="reel_bench_")
+    try:
+        make_inputs(workdir, args.scenes, args.duration)
+        print(f"{'mode':<12} {'run':>3} {'wall (s)':>10} {'peak disk (MB)':>15}")
+        for mode in ("segments", "single_pass"):
+            for run in range(1, args.repeat + 1):
+                elapsed, peak = measure(mode, workdir)
+                print(f"{mode:<12} {run:>3} {elapsed:>10.2f} {peak / 1e6:>15.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
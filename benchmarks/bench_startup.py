@@ -0,0 +1,79 @@
+"""
+Measure import-time startup cost with `python -X importtime`.
+
+For each module, imports it in a fresh interpreter several times and reports
+the median cumulative import time. It also lists the slowest top-level
+dependencies it pulled in, so eager heavy imports (crawl4ai, pydantic_ai,
+PIL, ...) show up. No API keys are needed: configuration is resolved on
+first use, not at import.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The CLI entry point, and the modules a process-pool worker needs
+MODULES = ["ai_reel_generator", "utils.video_generator", "utils.tts", "utils.image_generator"]
+
+
+def import_times(module):
+    """
+    Import module in a fresh interpreter; return (cumulative microseconds for
+    module, {direct dependency: cumulative microseconds})
+    """
+    env = dict(os.environ)
+    # Make sure no configuration is needed just to import
+    for name in ("OPENAI_API_KEY", "DEEPGRAM_API_KEY"):
+        env.pop(name, None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ""
+        raise RuntimeError(f"importing {module} failed: {last_line}")
+
+    # Each import is printed after its own imports, indented two spaces per level
+    children = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        depth = (len(package) - len(package.lstrip()) - 1) // 2
+        if depth == 1:
+            children[package.strip()] = int(cumulative)
+        elif depth == 0:
+            if package.strip() == module:
+                return int(cumulative), children
+            children = {}
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest dependencies listed per module")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        try:
+            runs = [import_times(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module}: {e}")
+            continue
+        total = statistics.median(micros for micros, _ in runs)
+        print(f"\n{module}: {total / 1000:.1f} ms (median of {args.repeat})")
+
+        packages = {package for _, children in runs for package in children}
+        medians = {package: statistics.median(children.get(package, 0) for _, children in runs)
+                   for package in packages}
+        for package, micros in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {micros / 1000:>8.1f} ms  {package}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare subtitle rendering modes ("drawtext", "overlay", "baked") by the
+time it takes to encode the same synthetic scenes. Requires ffmpeg on PATH.
+
+The caption deliberately contains quotes, colons and percent signs, which the
+drawtext chain has to escape; the pre-rendered modes pass no text to FFmpeg.
+
+    python benchmarks/bench_subtitles.py --scenes 6 --duration 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_render_modes import make_inputs  # noqa: E402
+from utils import video_generator  # noqa: E402
+
+CAPTION = "Doctors' advice: warm up for 10 minutes, layer up & don't skip 100% of winter runs"
+MODES = ("drawtext", "overlay", "baked")
+
+
+def render(workdir, subtitle_mode, render_mode):
+    video_generator.SUBTITLE_MODE = subtitle_mode
+    output = os.path.join(workdir, f"output_{subtitle_mode}.mp4")
+    started = time.perf_counter()
+    video_generator.create_video_with_audio_and_subtitles(
+        os.path.join(workdir, "images_processed"), os.path.join(workdir, "audios"), output,
+        mode=render_mode, srt_path=os.path.join(workdir, "subtitles.srt"), work_dir=workdir,
+        use_cache=False)
+    elapsed = time.perf_counter() - started
+    if not os.path.exists(output):
+        raise RuntimeError(f"{subtitle_mode} render did not produce {output}")
+    os.remove(output)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenes", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=8.0, help="seconds of narration per scene")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render-mode", default="segments", choices=["segments", "single_pass"])
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        sys.exit("ffmpeg is required for this benchmark")
+
+    workdir = tempfile.mkdtemp(prefix="reel_bench_subs_")
+    try:
+        make_inputs(workdir, args.scenes, args.duration, text=CAPTION)
+        frames = args.scenes * args.duration * 30
+        timings = {}
+        for subtitle_mode in MODES:
+            timings[subtitle_mode] = min(
+                render(workdir, subtitle_mode, args.render_mode) for _ in range(args.repeat))
+
+        baseline = timings["drawtext"]
+        print(f"\n{'mode':<10} {'best (s)':>9} {'fps':>8} {'speed-up':>9}")
+        for subtitle_mode, elapsed in timings.items():
+            print(f"{subtitle_mode:<10} {elapsed:>9.2f} {frames / elapsed:>8.1f} {baseline / elapsed:>8.2f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Offline stand-ins for WebScraper and SceneGenerator, used by the benchmarks.
+"""
+import asyncio
+
+ARTICLE_TEXT = """# Scientists map how cold weather changes the way we exercise
+
+Researchers followed thousands of runners through two winters and found that
+short warm-ups, layered clothing and midday sessions kept most of them active.
+"""
+
+SCENE_TEXTS = [
+    "Staying active in winter is harder than it looks, but new research has tips.",
+    "Researchers followed thousands of runners through two cold winters.",
+    "Short warm-ups indoors made the first minutes outside far easier.",
+    "Thin layers that trap warm air beat one heavy coat every time.",
+    "Midday sessions meant more daylight and fewer slips on icy paths.",
+    "Most runners who planned ahead kept their routine all season long.",
+]
+
+
+class FakeWebScraper:
+    def __init__(self, url, latency=0.5):
+        self.url = url
+        self.latency = latency
+
+    async def scrape(self):
+        await asyncio.sleep(self.latency)
+        return ARTICLE_TEXT
+
+
+class FakeSceneGenerator:
+    def __init__(self, scene_count=6, latency=2.0):
+        self.scene_count = scene_count
+        self.latency = latency
+
+    async def generate_scenes(self, article_text, usage=None):
+        from ai_reel_generator import Scene
+
+        await asyncio.sleep(self.latency)
+        return [
+            Scene(
+                scene_number=i,
+                text=SCENE_TEXTS[(i - 1) % len(SCENE_TEXTS)],
+                image_prompt=f"Scene {i}: a runner on a frosty morning, cinematic lighting",
+                timeframe=5,
+            )
+            for i in range(1, self.scene_count + 1)
+        ]
@@ -0,0 +1,178 @@
+"""
+Local stand-in for the OpenAI image and Deepgram TTS HTTP APIs.
+
+Serves canned PNGs and silent MP3s with configurable latency and error
+rates so the pipeline can be benchmarked without API keys or network access.
+Point the pipeline at it with OPENAI_BASE_URL=http://HOST:PORT/v1 and
+DEEPGRAM_BASE_URL=http://HOST:PORT.
+
+    python benchmarks/stub_server.py --port 8765 --image-latency 2 --tts-latency 0.5
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, mono, no CRC; an all-zero frame body decodes as silence
+MP3_FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0xC4])
+MP3_FRAME_LENGTH = 417
+MP3_SAMPLES_PER_FRAME = 1152
+MP3_SAMPLE_RATE = 44100
+
+# Roughly how fast a TTS voice reads, used to size the canned narration
+CHARS_PER_SECOND = 15
+
+
+def silent_mp3(seconds):
+    """
+    Build an MP3 of the given length made of silent frames
+    """
+    frames = max(1, math.ceil(seconds * MP3_SAMPLE_RATE / MP3_SAMPLES_PER_FRAME))
+    frame = MP3_FRAME_HEADER + bytes(MP3_FRAME_LENGTH - len(MP3_FRAME_HEADER))
+    return frame * frames
+
+
+def make_png(width, height, noise=True):
+    """
+    Build an RGB PNG; noise=True makes it incompressible, like a real DALL-E image
+    """
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    row_bytes = width * 3
+    if noise:
+        rows = b"".join(b"\x00" + os.urandom(row_bytes) for _ in range(height))
+    else:
+        rows = (b"\x00" + bytes([40, 90, 160]) * width) * height
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows, 1))
+        + chunk(b"IEND", b"")
+    )
+
+
+class StubConfig:
+    def __init__(self, image_latency=2.0, download_latency=0.2, tts_latency=0.5, jitter=0.2,
+                 error_rate=0.0, image_size=(1024, 1792), noise=True):
+        self.image_latency = image_latency
+        self.download_latency = download_latency
+        self.tts_latency = tts_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.png = make_png(*image_size, noise=noise)
+        self.requests = {"images": 0, "downloads": 0, "tts": 0, "errors": 0}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def delay(self, base):
+        time.sleep(max(0.0, random.gauss(base, base * self.jitter)))
+
+    def count(self, name):
+        with self.lock:
+            self.requests[name] += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _maybe_fail(self):
+        if random.random() >= self.config.error_rate:
+            return False
+        self.config.count("errors")
+        if random.random() < 0.5:
+            self._send(429, b'{"error": "rate limited"}', "application/json", {"Retry-After": "1"})
+        else:
+            self._send(500, b'{"error": "stub failure"}', "application/json")
+        return True
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path.startswith("/v1/images/generations"):
+            self.config.count("images")
+            self.config.delay(self.config.image_latency)
+            if self._maybe_fail():
+                return
+            host = self.headers.get("Host")
+            payload = {"data": [{"url": f"http://{host}/files/image{next(self.config.ids)}.png"}]}
+            self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+        elif self.path.startswith("/v1/speak"):
+            self.config.count("tts")
+            self.config.delay(self.config.tts_latency)
+            if self._maybe_fail():
+                return
+            seconds = len(body.decode("utf-8", "ignore")) / CHARS_PER_SECOND
+            self._send(200, silent_mp3(seconds), "audio/mpeg")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_GET(self):
+        if self.path.startswith("/files/"):
+            self.config.count("downloads")
+            self.config.delay(self.config.download_latency)
+            if self._maybe_fail():
+                return
+            self._send(200, self.config.png, "image/png")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+
+def start_stub_server(config, host="127.0.0.1", port=0):
+    """
+    Start the stub server on a background thread; returns (server, base_url)
+    """
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--image-latency", type=float, default=2.0)
+    parser.add_argument("--download-latency", type=float, default=0.2)
+    parser.add_argument("--tts-latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency standard deviation as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = StubConfig(args.image_latency, args.download_latency, args.tts_latency, args.jitter, args.error_rate)
+    server, base_url = start_stub_server(config, args.host, args.port)
+    print(f"Stub server on {base_url}")
+    print(f"  OPENAI_BASE_URL={base_url}/v1 DEEPGRAM_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+import random
+import struct
+
+import pytest
+
+from utils.audio_probe import mp3_duration
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding: 417-byte frames of 1152 samples
+FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x44])
+FRAME_LENGTH = 417
+FRAME_SECONDS = 1152 / 44100
+
+
+def mp3_frames(count):
+    return (FRAME_HEADER + bytes(FRAME_LENGTH - 4)) * count
+
+
+def id3_tag(size):
+    # Sync-safe size: 7 bits per byte
+    encoded = bytes([(size >> shift) & 0x7F for shift in (21, 14, 7, 0)])
+    return b"ID3\x04\x00\x00" + encoded + bytes(size)
+
+
+def wav(seconds, sample_rate=44100):
+    samples = bytes(int(seconds * sample_rate) * 2)
+    header = b"RIFF" + struct.pack("<I", 36 + len(samples)) + b"WAVEfmt "
+    header += struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    return header + b"data" + struct.pack("<I", len(samples)) + samples
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(name, data):
+        path = os.path.join(tmp_path, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+    return write
+
+
+def test_frame_headers_give_duration(write):
+    path = write("scene.mp3", id3_tag(64) + mp3_frames(100))
+    assert mp3_duration(path) == pytest.approx(100 * FRAME_SECONDS)
+
+
+def test_resyncs_after_junk_between_frames(write):
+    path = write("scene.mp3", mp3_frames(50) + b"\x00junk\xff\xfb" + mp3_frames(50))
+    assert mp3_duration(path) == pytest.approx(100 * FRAME_SECONDS)
+
+
+def test_wav_is_not_parsed_as_mp3(write):
+    # A silent WAV is full of bytes a naive scan would take for frame headers
+    data = bytearray(wav(3))
+    for offset in range(100, len(data) - 4, 997):
+        data[offset:offset + 4] = FRAME_HEADER
+    assert mp3_duration(write("scene.wav", bytes(data))) is None
+
+
+def test_random_bytes_are_not_parsed_as_mp3(write):
+    noise = random.Random(0).randbytes(200_000)
+    assert mp3_duration(write("noise.bin", noise)) is None
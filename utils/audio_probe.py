@@ -0,0 +1,196 @@
+import subprocess
+
+from .instrumentation import run_subprocess
+
+# Bitrates in kbps indexed by [MPEG-1?][layer][bitrate index]
+BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+
+# Sample rates indexed by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+
+def parse_frame_header(header):
+    """
+    Parse a 4-byte MPEG audio frame header.
+    Returns (frame_length, samples_per_frame, sample_rate, mono) or None if invalid.
+    """
+    if header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    mono = (header[3] >> 6) == 0x03
+
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+
+    if layer == 1:
+        samples = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or mpeg1) else 576
+        frame_length = samples // 8 * bitrate // sample_rate + padding
+
+    return frame_length, samples, sample_rate, mono
+
+
+def _id3v2_size(data):
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _vbr_header(data, offset, header, mono):
+    """
+    Look for a Xing/Info or VBRI header in the first frame.
+    Returns (found, frame_count); frame_count is None when the header omits it.
+    """
+    mpeg1 = ((header[1] >> 3) & 0x03) == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[xing + 4:xing + 8], "big")
+        if flags & 0x01:
+            return True, int.from_bytes(data[xing + 8:xing + 12], "big")
+        return True, None
+    vbri = offset + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        return True, int.from_bytes(data[vbri + 14:vbri + 18], "big")
+    return False, None
+
+
+# Consecutive frame headers that must chain (each starting where the previous
+# frame ends) before a header found by scanning is trusted
+SYNC_FRAMES = 3
+
+
+def _same_stream(header, reference):
+    # Version, layer and sample rate never change within one MP3 stream
+    return (header[1] & 0xFE, header[2] & 0x0C) == (reference[1] & 0xFE, reference[2] & 0x0C)
+
+
+def _chained_frames(data, offset, end, count, reference=None):
+    """
+    True if count frame headers from the same stream follow each other from
+    offset, or the frames that do run exactly to the end of the data
+    """
+    reference = reference or data[offset:offset + 4]
+    for _ in range(count):
+        if offset >= end:
+            # The previous frame ran to the end of the file (or was cut short)
+            return True
+        header = data[offset:offset + 4]
+        if offset + 4 > end or not _same_stream(header, reference):
+            return False
+        frame = parse_frame_header(header)
+        if frame is None or frame[0] <= 0:
+            return False
+        offset += frame[0]
+    return True
+
+
+def mp3_duration(audio_path):
+    """
+    Compute the duration of an MP3 file in seconds by reading its frame
+    headers, without decoding any audio. The first frame must start the file
+    (after any ID3 tag) and be followed by another frame; anywhere else,
+    SYNC_FRAMES headers must chain before they are counted, so files that
+    are not MP3 return None instead of a made-up duration.
+    """
+    with open(audio_path, "rb") as f:
+        data = f.read()
+
+    offset = _id3v2_size(data)
+    end = len(data)
+    if end - offset >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    if not _chained_frames(data, offset, end, 2):
+        return None
+    reference = data[offset:offset + 4]
+
+    duration = 0.0
+    first_frame = True
+    while offset + 4 <= end:
+        header = data[offset:offset + 4]
+        frame = parse_frame_header(header) if _same_stream(header, reference) else None
+        if frame is None or frame[0] <= 0:
+            # Lost sync; scan forward to the next run of frame headers
+            offset += 1
+            while offset + 4 <= end and not _chained_frames(data, offset, end, SYNC_FRAMES, reference):
+                offset += 1
+            continue
+
+        frame_length, samples, sample_rate, mono = frame
+        if first_frame:
+            first_frame = False
+            found, frame_count = _vbr_header(data, offset, header, mono)
+            if frame_count:
+                return frame_count * samples / sample_rate
+            if found:
+                # The VBR header frame itself carries no audio
+                offset += frame_length
+                continue
+
+        duration += samples / sample_rate
+        offset += frame_length
+
+    return duration or None
+
+
+def ffprobe_duration(audio_path):
+    """
+    Get the duration of an audio file from its container header using ffprobe
+    """
+    try:
+        command = [
+            "ffprobe", "-i", audio_path,
+            "-show_entries", "format=duration",
+            "-v", "quiet", "-of", "csv=p=0"
+        ]
+        result = run_subprocess(command, name="ffprobe", path=audio_path)
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, command)
+        return float(result.stdout.strip())
+    except Exception as e:
+        print(f"Error getting audio duration: {e}")
+        return None
+
+
+def probe_duration(audio_path):
+    """
+    Get the duration of an audio file, parsing MP3 headers in Python and only
+    launching ffprobe for files that are not MP3
+    """
+    try:
+        duration = mp3_duration(audio_path)
+    except OSError as e:
+        print(f"Error reading {audio_path}: {e}")
+        return None
+    if duration:
+        return duration
+    return ffprobe_duration(audio_path)
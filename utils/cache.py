@@ -0,0 +1,250 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+
+from . import config
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai_reel_generator")
+
+# Eviction frees space down to this fraction of max_bytes, so a full cache is
+# not rescanned on every store
+EVICT_TO = 0.9
+
+
+def cache_root():
+    """
+    Root directory for all local caches; override with REEL_CACHE_DIR (also read from .env)
+    """
+    return config.get_setting("REEL_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+def hash_text(text):
+    """
+    Return the SHA-256 hex digest of a string
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path):
+    """
+    Return the SHA-256 hex digest of a file's contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Content-addressed, size-bounded cache of files on disk.
+
+    Each entry is stored under the SHA-256 of its key parts together with a
+    JSON metadata sidecar. When the total size exceeds max_bytes the least
+    recently used entries (by modification time, refreshed on every hit) are
+    evicted. The total is tracked as entries are stored, so the cache
+    directory is only scanned on first use and when the total goes over
+    max_bytes. Give either a cache_dir, or a namespace to be placed under
+    cache_root() when the cache is first used.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=2 * 1024 ** 3, namespace=None):
+        if cache_dir is None and namespace is None:
+            raise ValueError("DiskCache needs a cache_dir or a namespace")
+        self._cache_dir = cache_dir
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Running estimate of the cache size in bytes; None until the first scan
+        self._size = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self):
+        if self._cache_dir is None:
+            self._cache_dir = os.path.join(cache_root(), self.namespace)
+        return self._cache_dir
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        Build a cache key from any JSON-serialisable parts
+        """
+        return hash_text(json.dumps(parts, sort_keys=True))
+
+    def _data_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _meta_path(self, key):
+        return self._data_path(key) + ".json"
+
+    def _record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_path(self, key):
+        """
+        Return the path of a cached entry, or None on a miss
+        """
+        path = self._data_path(key)
+        if not os.path.exists(path):
+            self._record(False)
+            return None
+        try:
+            # Mark as recently used
+            os.utime(path)
+        except OSError:
+            self._record(False)
+            return None
+        self._record(True)
+        return path
+
+    def get(self, key):
+        """
+        Return the cached bytes for key, or None on a miss
+        """
+        path = self.get_path(key)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def get_meta(self, key):
+        """
+        Return the metadata stored alongside key, or None if there is none
+        """
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_atomic(self, path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_meta(self, key, meta):
+        if meta is None:
+            return
+        payload = json.dumps(meta).encode("utf-8")
+        self._write_atomic(self._meta_path(key), lambda f: f.write(payload))
+
+    @staticmethod
+    def _entry_size(path):
+        size = 0
+        for part in (path, path + ".json"):
+            try:
+                size += os.path.getsize(part)
+            except OSError:
+                pass
+        return size
+
+    def _stored(self, path, previous_size):
+        """
+        Account for an entry just written over one of previous_size bytes, evicting if over budget
+        """
+        with self._lock:
+            if self._size is not None:
+                self._size += self._entry_size(path) - previous_size
+            over = self._size is None or self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def put(self, key, data, meta=None):
+        """
+        Store bytes under key and return the cached path
+        """
+        path = self._data_path(key)
+        previous_size = self._entry_size(path)
+        self._write_meta(key, meta)
+        self._write_atomic(path, lambda f: f.write(data))
+        self._stored(path, previous_size)
+        return path
+
+    def put_file(self, key, source_path, meta=None):
+        """
+        Copy an existing file into the cache under key and return the cached path
+        """
+        path = self._data_path(key)
+        previous_size = self._entry_size(path)
+        self._write_meta(key, meta)
+
+        def copy(f):
+            with open(source_path, "rb") as source:
+                shutil.copyfileobj(source, f)
+
+        self._write_atomic(path, copy)
+        self._stored(path, previous_size)
+        return path
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if name.endswith((".json", ".tmp")):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                size = stat.st_size
+                if os.path.exists(path + ".json"):
+                    size += os.path.getsize(path + ".json")
+                entries.append((stat.st_mtime, size, path))
+        return entries
+
+    def evict(self):
+        """
+        Once the cache exceeds max_bytes, remove least recently used entries
+        until it fits in EVICT_TO of max_bytes. Scans the whole cache, which
+        also resets the running size estimate.
+        """
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            limit = self.max_bytes * EVICT_TO if total > self.max_bytes else self.max_bytes
+            for _, size, path in sorted(entries):
+                if total <= limit:
+                    break
+                for stale in (path, path + ".json"):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+                total -= size
+                self.evictions += 1
+            self._size = total
+
+    def stats(self):
+        """
+        Return hit/miss/eviction counters and current cache size
+        """
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
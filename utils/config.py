@@ -0,0 +1,59 @@
+import os
+import threading
+
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def load_env():
+    """
+    Load .env into the environment once, on first use rather than at import
+    """
+    global _loaded
+    with _load_lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _loaded = True
+
+
+def get_setting(name, default=None):
+    load_env()
+    return os.getenv(name, default)
+
+
+def require(name):
+    """
+    Return a required setting, raising ValueError if it is missing
+    """
+    value = get_setting(name)
+    if not value:
+        raise ValueError(f"Missing {name} in environment variables.")
+    return value
+
+
+def openai_api_key():
+    return require("OPENAI_API_KEY")
+
+
+def deepgram_api_key():
+    return require("DEEPGRAM_API_KEY")
+
+
+def openai_base_url():
+    # OPENAI_BASE_URL points the client at another OpenAI-compatible endpoint (e.g. a local stub)
+    return get_setting("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
+
+def deepgram_base_url():
+    # DEEPGRAM_BASE_URL points the client at another Deepgram-compatible endpoint (e.g. a local stub)
+    return get_setting("DEEPGRAM_BASE_URL", "https://api.deepgram.com").rstrip("/")
+
+
+def check_api_keys():
+    """
+    Fail fast, before any work starts, if an API key the pipeline needs is missing
+    """
+    if not get_setting("OPENAI_API_KEY") or not get_setting("DEEPGRAM_API_KEY"):
+        raise ValueError("Missing API keys in environment variables.")
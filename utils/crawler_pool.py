@@ -0,0 +1,124 @@
+import time
+import asyncio
+from collections import OrderedDict
+
+from .instrumentation import tracer
+
+# Per-URL fetch latencies kept for stats(); the oldest are dropped first
+MAX_LATENCIES = 1000
+
+
+class _Browser:
+    """
+    One warm AsyncWebCrawler and the number of pages it has served
+    """
+
+    def __init__(self):
+        # crawl4ai pulls in the whole browser stack, so import it only once a browser is needed
+        from crawl4ai import AsyncWebCrawler
+
+        self.crawler = AsyncWebCrawler()
+        self.started = False
+        self.start_lock = asyncio.Lock()
+        self.active = 0
+        self.served = 0
+        self.retiring = False
+
+
+class CrawlerPool:
+    """
+    Long-lived set of headless browsers shared by every scrape in a process.
+
+    Browsers are launched on first use and kept warm, each serving up to
+    pages_per_browser concurrent pages. After recycle_after pages a browser
+    stops taking new work and is closed once its last page finishes, bounding
+    the memory a long batch can leak; a fresh one is launched on demand.
+    """
+
+    def __init__(self, browsers=1, pages_per_browser=4, recycle_after=50):
+        self.browsers = browsers
+        self.pages_per_browser = pages_per_browser
+        self.recycle_after = recycle_after
+        self._pages = asyncio.Semaphore(browsers * pages_per_browser)
+        self._lock = asyncio.Lock()
+        self._pool = []
+        self.launched = 0
+        self.recycled = 0
+        self.pages = 0
+        self.latencies = OrderedDict()
+
+    async def _acquire(self):
+        async with self._lock:
+            live = [browser for browser in self._pool if not browser.retiring]
+            browser = min((b for b in live if b.active < self.pages_per_browser),
+                          key=lambda b: b.active, default=None)
+            if browser is None or (browser.active and len(live) < self.browsers):
+                browser = _Browser()
+                self._pool.append(browser)
+            browser.active += 1
+            return browser
+
+    async def _ensure_started(self, browser):
+        # Launch outside the pool lock so pages on warm browsers are not held up
+        async with browser.start_lock:
+            if browser.started:
+                return
+            with tracer.span("crawler.launch"):
+                await browser.crawler.__aenter__()
+            browser.started = True
+            self.launched += 1
+
+    async def _release(self, browser):
+        async with self._lock:
+            browser.active -= 1
+            browser.served += 1
+            self.pages += 1
+            if browser.served >= self.recycle_after:
+                browser.retiring = True
+            if not (browser.retiring and browser.active == 0):
+                return
+            self._pool.remove(browser)
+        if browser.started:
+            await browser.crawler.__aexit__(None, None, None)
+        self.recycled += 1
+
+    async def fetch(self, url):
+        """
+        Crawl url on a warm browser and return crawl4ai's result
+        """
+        async with self._pages:
+            browser = await self._acquire()
+            started = time.perf_counter()
+            try:
+                await self._ensure_started(browser)
+                # Latency covers the page fetch only, not a cold browser launch
+                started = time.perf_counter()
+                with tracer.span("crawler.fetch", category="api", url=url):
+                    return await browser.crawler.arun(url=url)
+            finally:
+                self.latencies.pop(url, None)
+                self.latencies[url] = time.perf_counter() - started
+                while len(self.latencies) > MAX_LATENCIES:
+                    self.latencies.popitem(last=False)
+                await self._release(browser)
+
+    async def close(self):
+        """
+        Shut down every browser
+        """
+        async with self._lock:
+            pool, self._pool = self._pool, []
+        for browser in pool:
+            if browser.started:
+                await browser.crawler.__aexit__(None, None, None)
+
+    def stats(self):
+        """
+        Browser launch/recycle counts and fetch latency in seconds for the last MAX_LATENCIES URLs
+        """
+        return {
+            "launched": self.launched,
+            "recycled": self.recycled,
+            "pages": self.pages,
+            "latencies": dict(self.latencies),
+        }
@@ -0,0 +1,178 @@
+import os
+import time
+import random
+import hashlib
+import tempfile
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limit import PRIORITY_INTERACTIVE
+
+# Connection pooling: number of per-host pools kept, and connections per host
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 16
+
+# Timeouts in seconds; image generation responses can take well over 30s
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 120
+
+# Retries with jittered exponential backoff
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Response bodies are written to disk in chunks of this size, so each
+# in-flight transfer holds at most one chunk in memory
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {"requests": 0, "retries": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide keep-alive session shared by every API client
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """
+    Full-jitter exponential backoff: a random delay up to base * 2**attempt, capped
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after_seconds(response):
+    """
+    Parse a Retry-After header (seconds or HTTP date), returning None if absent
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def request(method, url, max_retries=MAX_RETRIES, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), limiter=None,
+            priority=PRIORITY_INTERACTIVE, **kwargs):
+    """
+    Send a request over the shared session, retrying connection errors,
+    timeouts and retryable status codes with jittered exponential backoff
+    (or the server's Retry-After). With a rate limiter, every attempt first
+    waits for a token at the given priority, and 429s slow the limiter down
+    instead of sleeping here. Returns the last response, or raises the last
+    connection error.
+    """
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire(priority)
+        _count("requests")
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _count("errors")
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt)
+        else:
+            if limiter is not None:
+                if response.status_code == 429:
+                    limiter.on_throttle(retry_after_seconds(response))
+                elif response.status_code < 500:
+                    limiter.on_success()
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            response.close()
+            if limiter is not None and response.status_code == 429:
+                # The limiter is paused for Retry-After; the next acquire() waits it out
+                _count("retries")
+                continue
+
+        _count("retries")
+        time.sleep(delay)
+
+
+def stream_to_file(response, path, chunk_size=DOWNLOAD_CHUNK_SIZE, hash_name=None):
+    """
+    Write a streamed response body (request(..., stream=True)) to path in
+    chunks, via a temp file in the same directory that is atomically renamed
+    into place, so readers never see a partial file. With hash_name (e.g.
+    "sha256") the body is hashed as it streams. Returns (bytes written, hex
+    digest or None). The response is closed, releasing its connection.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.new(hash_name) if hash_name else None
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with response, os.fdopen(fd, "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                size += len(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, digest.hexdigest() if digest is not None else None
+
+
+def pool_stats():
+    """
+    Request/retry counters and, per host, how many connections were opened
+    and how many requests they served
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    hosts = []
+    if _session is not None:
+        adapters = {id(adapter): adapter for adapter in _session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                hosts.append({
+                    "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle": pool.pool.qsize() if pool.pool is not None else 0,
+                })
+    stats["hosts"] = hosts
+    return stats
@@ -2,48 +2,62 @@ import os
 import time
 import mimetypes
 import requests
+from urllib.parse import urlparse
+
+from . import http_client
+from .instrumentation import tracer
+
+
+def image_extension(content_type, url):
+    """
+    Pick a file extension from the Content-Type header, falling back to the URL's
+    """
+    extension = None
+    if content_type:
+        extension = mimetypes.guess_extension(content_type.split(";")[0].strip())
+    return extension or os.path.splitext(urlparse(url).path)[1] or ".png"
+
+
+def fetch_image(url, filename, output_dir='images'):
+    """
+    Make a single attempt at downloading an image, streaming it to disk, and
+    return the saved path or None
+    """
+    try:
+        with tracer.span("image.download", category="api", filename=filename) as span:
+            # Retries are driven by the caller so that its backoff can be non-blocking
+            response = http_client.request("GET", url, max_retries=0, stream=True)
+            span["status"] = response.status_code
+
+            if response.status_code != 200:
+                response.close()
+                print(f"Failed to download image. Status code: {response.status_code}")
+                return None
+
+            # The headers arrive before the body, so the final name is known up front
+            filename_with_extension = f"{filename}{image_extension(response.headers.get('Content-Type'), url)}"
+            image_path = os.path.join(output_dir, filename_with_extension)
+            span["bytes"], _ = http_client.stream_to_file(response, image_path)
+
+        print(f"Image '{filename_with_extension}' downloaded successfully.")
+        return image_path
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error occurred while downloading image: {e}")
 
+    return None
 
-def download_image(url, filename, max_retries=3, retry_delay=1):
+
+def download_image(url, filename, max_retries=3, retry_delay=1, output_dir='images'):
     retries = 0
     while retries < max_retries:
-        try:
-            # Send a GET request to the URL
-            response = requests.get(url)
-            print(f'{retries} try')
-            # Check if the request was successful
-            if response.status_code == 200:
-                # Get the Content-Type header from the response
-                content_type = response.headers.get('Content-Type')
-
-                # Determine the file extension based on the Content-Type
-                extension = mimetypes.guess_extension(content_type)
-
-                # Append the extension to the provided filename
-                filename_with_extension = f"{filename}{extension}"
-
-                # Create a directory to save the image (if it doesn't exist)
-                os.makedirs('images', exist_ok=True)
-
-                # Open a file in binary write mode
-                with open(os.path.join('images', filename_with_extension), 'wb') as file:
-                    # Write the content of the response to the file
-                    file.write(response.content)
-
-                print(
-                    f"Image '{filename_with_extension}' downloaded successfully.")
-                return
-
-            else:
-                print(f"Failed to download image. Status code: {response.status_code}")
-                retries += 1
-                time.sleep(retry_delay)
+        print(f'{retries} try')
+        image_path = fetch_image(url, filename, output_dir)
+        if image_path:
+            return image_path
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error occurred while downloading image: {e}")
-            retries += 1
-            time.sleep(retry_delay)
+        time.sleep(http_client.backoff_delay(retries, base=retry_delay))
+        retries += 1
 
     print(f"Failed to download image after {max_retries} retries.")
-
-
+    return None
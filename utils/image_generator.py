@@ -1,41 +1,55 @@
-import os
 import json
-import requests
 
-from dotenv import load_dotenv
+from . import config, http_client
+from .instrumentation import tracer
+from .rate_limit import get_limiter, PRIORITY_INTERACTIVE
 
-# Load environment variables from .env file
-load_dotenv()
+IMAGE_MODEL = "dall-e-3"
+IMAGE_SIZE = "1024x1792"
 
-# Retrieve the API key
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-if not OPENAI_API_KEY:
-    raise ValueError("Missing OPENAI_API_KEY in environment variables.")
+def request_headers():
+    return {
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {config.openai_api_key()}'
+    }
 
 
-url = "https://api.openai.com/v1/images/generations"
-
-headers = {
-    'Content-Type': 'application/json',
-    'Authorization': f'Bearer {OPENAI_API_KEY}'
-}
-
-
-def generate_image(prompt: str) -> str:
+def generate_image(prompt: str, usage=None) -> str:
+    """
+    Generate an image and return its URL, or None on failure. Requests go
+    through the shared OpenAI image rate limiter at the reel's priority; the
+    call and its estimated cost are recorded on usage (a ReelUsage), if given.
+    """
     if not prompt:
         return None
+    priority = usage.priority if usage else PRIORITY_INTERACTIVE
     try:
         payload = json.dumps({
-            "model": "dall-e-3",
+            "model": IMAGE_MODEL,
             "prompt": prompt,
             "n": 1,
-            "size": "1024x1792"
+            "size": IMAGE_SIZE
         })
 
-        response = requests.request("POST", url, headers=headers, data=payload)
-
+        with tracer.span("image.generate", category="api") as span:
+            response = http_client.request(
+                "POST", f"{config.openai_base_url()}/images/generations", headers=request_headers(), data=payload,
+                limiter=get_limiter("openai.images"), priority=priority)
+            span["status"] = response.status_code
+            span["bytes"] = len(response.content)
+
+        if response.status_code != 200:
+            print(f"Image generation failed with status {response.status_code}: {response.text[:500]}")
+            if usage:
+                usage.record("openai.images", ok=False)
+            return None
+
+        if usage:
+            usage.record("openai.images", units=1)
         return response.json().get('data')[0]['url']
     except Exception as e:
         print(f"Error generating image: {e}")
+        if usage:
+            usage.record("openai.images", ok=False)
         return None
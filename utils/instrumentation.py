@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import threading
+import subprocess
+from collections import deque
+from contextlib import contextmanager
+
+# Most recent spans kept in memory; older ones are dropped
+MAX_EVENTS = 100_000
+
+
+class Tracer:
+    """
+    Records timed spans (pipeline stages, per-scene API calls, subprocesses)
+    from any thread, and exports them as JSON lines or as a Chrome trace file
+    (load it in chrome://tracing or https://ui.perfetto.dev). Keeps at most
+    max_events spans; with enabled set to False spans are timed but not kept.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.enabled = True
+        self.max_events = max_events
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._thread_ids = {}
+
+    def _thread_id(self):
+        thread = threading.current_thread()
+        with self._lock:
+            if thread.ident not in self._thread_ids:
+                self._thread_ids[thread.ident] = (len(self._thread_ids) + 1, thread.name)
+            return self._thread_ids[thread.ident][0]
+
+    @contextmanager
+    def span(self, name, category="stage", **attrs):
+        """
+        Time a block of code. Yields a dict the block can add fields to
+        (retries, bytes, cache hits...); they are stored with the span.
+        """
+        args = dict(attrs)
+        thread_id = self._thread_id()
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if self.enabled:
+                end = time.perf_counter()
+                event = {
+                    "name": name,
+                    "cat": category,
+                    "start": start - self._origin,
+                    "seconds": end - start,
+                    "thread": thread_id,
+                    "args": args,
+                }
+                with self._lock:
+                    self.events.append(event)
+
+    def reset(self):
+        with self._lock:
+            self.events = deque(maxlen=self.max_events)
+            self._origin = time.perf_counter()
+
+    def write_jsonl(self, path):
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, default=str) + "\n")
+
+    def write_chrome_trace(self, path):
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self._thread_ids.values())
+        pid = os.getpid()
+        trace_events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        trace_events += [
+            {
+                "name": event["name"],
+                "cat": event["cat"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["seconds"] * 1e6,
+                "pid": pid,
+                "tid": event["thread"],
+                "args": event["args"],
+            }
+            for event in events
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f, default=str)
+
+    def summary(self):
+        """
+        Total wall time and call count per span name
+        """
+        totals = {}
+        with self._lock:
+            for event in self.events:
+                total = totals.setdefault(event["name"], {"count": 0, "seconds": 0.0})
+                total["count"] += 1
+                total["seconds"] += event["seconds"]
+        return totals
+
+
+# Process-wide tracer used by every stage
+tracer = Tracer()
+
+
+def _drain(stream, chunks):
+    chunks.append(stream.read())
+    stream.close()
+
+
+def run_subprocess(command, name=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **attrs):
+    """
+    subprocess.run() replacement that records a span with the child's wall
+    time, user/system CPU time and peak RSS. Returns a CompletedProcess.
+    """
+    with tracer.span(name or os.path.basename(command[0]), category="subprocess", **attrs) as args:
+        process = subprocess.Popen(command, stdout=stdout, stderr=stderr, text=text)
+
+        if not hasattr(os, "wait4"):
+            out, err = process.communicate()
+            args["returncode"] = process.returncode
+            return subprocess.CompletedProcess(command, process.returncode, out, err)
+
+        # Read the pipes ourselves so the child can be reaped with wait4(),
+        # which is the only way to get resource usage for this one process
+        outputs = {}
+        readers = []
+        for label, stream in (("stdout", process.stdout), ("stderr", process.stderr)):
+            if stream is not None:
+                outputs[label] = []
+                reader = threading.Thread(target=_drain, args=(stream, outputs[label]), daemon=True)
+                reader.start()
+                readers.append(reader)
+        for reader in readers:
+            reader.join()
+
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        args["returncode"] = process.returncode
+        args["user_cpu"] = usage.ru_utime
+        args["system_cpu"] = usage.ru_stime
+        args["max_rss_kb"] = usage.ru_maxrss
+
+        out = outputs["stdout"][0] if "stdout" in outputs else None
+        err = outputs["stderr"][0] if "stderr" in outputs else None
+        return subprocess.CompletedProcess(command, process.returncode, out, err)
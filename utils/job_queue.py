@@ -0,0 +1,151 @@
+import json
+import time
+import sqlite3
+import threading
+
+from .rate_limit import PRIORITY_INTERACTIVE
+
+QUEUE_PATH = "reel_queue.sqlite3"
+
+# Job lifecycle: queued -> running -> done | failed
+JOB_STATUSES = ["queued", "running", "done", "failed"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    workdir TEXT,
+    error TEXT,
+    usage TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+"""
+
+# Columns added after the first schema, with their definitions
+MIGRATIONS = {
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+    "usage": "TEXT",
+}
+
+
+class JobQueue:
+    """
+    Durable queue of reel jobs in a SQLite database, served by priority
+    (lower first), then in arrival order. Jobs survive a restart: any left
+    "running" by a process that died are put back in the queue by
+    requeue_running(). Safe to share between threads; claim() takes a write
+    lock so several processes can also consume the same file.
+    """
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_next ON jobs (status, priority, id)")
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        job["usage"] = json.loads(job["usage"]) if job["usage"] else None
+        return job
+
+    def enqueue(self, url, options=None, priority=PRIORITY_INTERACTIVE):
+        """
+        Add a job and return it
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (url, options, priority, created_at) VALUES (?, ?, ?, ?)",
+                (url, json.dumps(options or {}), priority, time.time()))
+            job_id = cursor.lastrowid
+        return self.get(job_id)
+
+    def claim(self):
+        """
+        Mark the next queued job (highest priority, then oldest) as running and
+        return it, or None if the queue is empty
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority, id LIMIT 1").fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row["id"]))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def start(self, job_id, workdir):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET workdir = ? WHERE id = ?", (workdir, job_id))
+
+    def finish(self, job_id, error=None, usage=None):
+        """
+        Record a job as done, or failed with the given error, with its API usage summary
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, usage = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "done", error, json.dumps(usage) if usage else None, time.time(), job_id))
+
+    def requeue_running(self):
+        """
+        Put jobs interrupted by a previous shutdown back in the queue; returns how many
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+            return cursor.rowcount
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def list(self, status=None, limit=50):
+        """
+        Most recent jobs first, optionally only those with the given status
+        """
+        query = "SELECT * FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def depth(self):
+        """
+        Number of jobs in each status
+        """
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        with self._lock:
+            for status, count in self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[status] = count
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
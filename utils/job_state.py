@@ -0,0 +1,87 @@
+import os
+import json
+import hashlib
+import tempfile
+
+JOB_STATE_PATH = "job_state.json"
+
+# Pipeline stages in execution order
+STAGES = ["scrape", "scenes", "images", "audio", "video"]
+
+
+def fingerprint(*parts):
+    """
+    Hash a stage's inputs into a fingerprint
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def files_digest(paths):
+    """
+    Hash the contents of a list of files, in order
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JobState:
+    """
+    Persisted record of which pipeline stages have completed, the fingerprint
+    of the inputs each one ran with, and the files it produced. A stage is
+    only skipped on a re-run if its fingerprint still matches and all of its
+    output files still exist.
+    """
+
+    def __init__(self, path=JOB_STATE_PATH):
+        self.path = path
+        self.stages = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.stages = json.load(f).get("stages", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable job state {path}: {e}")
+
+    def is_fresh(self, stage, stage_fingerprint):
+        entry = self.stages.get(stage)
+        if not entry or entry.get("fingerprint") != stage_fingerprint:
+            return False
+        return all(os.path.exists(path) for path in entry.get("outputs", []))
+
+    def digest(self, stage):
+        """
+        Return the digest recorded for a completed stage's outputs
+        """
+        return self.stages.get(stage, {}).get("digest")
+
+    def mark_done(self, stage, stage_fingerprint, outputs, digest=None):
+        self.stages[stage] = {
+            "fingerprint": stage_fingerprint,
+            "outputs": list(outputs),
+            "digest": digest or stage_fingerprint,
+        }
+        self.save()
+
+    def invalidate(self, stage):
+        """
+        Forget a stage so that it, and anything fingerprinted from its digest, re-runs
+        """
+        if self.stages.pop(stage, None) is not None:
+            self.save()
+
+    def reset(self):
+        self.stages = {}
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages}, f, indent=2)
+        os.replace(tmp_path, self.path)
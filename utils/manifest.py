@@ -0,0 +1,23 @@
+import json
+
+MANIFEST_PATH = "audio_manifest.json"
+
+
+def write_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """
+    Write the per-scene manifest (scene number, audio path, duration, text) as JSON
+    """
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_manifest(manifest_path=MANIFEST_PATH):
+    """
+    Read a per-scene manifest, returning None if it is missing or unreadable
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading manifest: {e}")
+        return None
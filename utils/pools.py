@@ -0,0 +1,34 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .subtitles_generator import TTS_WORKERS
+from .video_generator import RENDER_JOBS, PREPROCESS_WORKERS, process_pool
+
+
+class ResourcePools:
+    """
+    Separately sized worker pools shared by every reel in a process, so that
+    many concurrent jobs saturate each external resource without overrunning it.
+
+    scrape and llm are asyncio semaphores (those calls are already async);
+    image, tts and ffmpeg are thread pools that run the blocking HTTP and
+    subprocess work; preprocess is a process pool for CPU-bound image resizing
+    (see video_generator.process_pool for how its workers are started).
+    """
+
+    def __init__(self, scrape_workers=4, llm_workers=4, image_workers=8, tts_workers=TTS_WORKERS,
+                 ffmpeg_workers=RENDER_JOBS, preprocess_workers=PREPROCESS_WORKERS):
+        self.scrape = asyncio.Semaphore(scrape_workers)
+        self.scrape_workers = scrape_workers
+        self.llm = asyncio.Semaphore(llm_workers)
+        self.image_workers = image_workers
+        self.tts_workers = tts_workers
+        self.ffmpeg_workers = ffmpeg_workers
+        self.image = ThreadPoolExecutor(max_workers=image_workers, thread_name_prefix="image")
+        self.tts = ThreadPoolExecutor(max_workers=tts_workers, thread_name_prefix="tts")
+        self.ffmpeg = ThreadPoolExecutor(max_workers=ffmpeg_workers, thread_name_prefix="ffmpeg")
+        self.preprocess = process_pool(preprocess_workers)
+
+    def shutdown(self):
+        for pool in (self.image, self.tts, self.ffmpeg, self.preprocess):
+            pool.shutdown(wait=True)
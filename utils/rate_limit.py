@@ -0,0 +1,209 @@
+import time
+import heapq
+import itertools
+import threading
+
+from . import config
+
+# Scheduling priorities; lower runs first. Interactive reels jump ahead of
+# batch backfill waiting on the same provider.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+PRIORITIES = {"interactive": PRIORITY_INTERACTIVE, "batch": PRIORITY_BATCH}
+
+# The account's request limit (per second) and burst per provider. Limiters
+# start at this rate, so requests are only slowed down once the provider
+# actually returns a 429: the rate is then multiplied by RATE_DECREASE, and
+# grows back by RATE_INCREASE times the limit after each success, never past
+# the limit. Override per provider with e.g. OPENAI_IMAGES_RATE and
+# OPENAI_IMAGES_BURST in the environment or .env.
+PROVIDER_LIMITS = {
+    "openai.images": {"rate": 10.0, "burst": 20},
+    "deepgram.tts": {"rate": 25.0, "burst": 50},
+}
+RATE_INCREASE = 0.05
+RATE_DECREASE = 0.5
+MIN_RATE = 0.02
+
+# Estimated list price in USD per unit: one image, one character of narration,
+# one LLM token
+UNIT_COSTS = {
+    "openai.images": 0.08,
+    "deepgram.tts": 0.015 / 1000,
+    "openai.chat": 0.6 / 1_000_000,
+}
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate follows AIMD: additive increase after each
+    successful request, multiplicative decrease on a 429. A Retry-After pauses
+    the bucket entirely until it has passed. Waiters are served strictly in
+    (priority, arrival) order, so a high-priority request never queues behind
+    lower-priority ones. Blocking; meant to be called from worker threads.
+    """
+
+    def __init__(self, name, rate, burst=1):
+        self.name = name
+        self.rate = rate
+        self.increase = rate * RATE_INCREASE
+        self.max_rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._waiters = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE):
+        """
+        Block until this request may be sent
+        """
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    if now >= self.paused_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        self.requests += 1
+                        self.waited += now - started
+                        return
+                    wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """
+        Back off after a 429: cut the rate by RATE_DECREASE, and pause for Retry-After if given
+        """
+        with self._cond:
+            self.throttled += 1
+            self.rate = max(MIN_RATE, self.rate * RATE_DECREASE)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "rate": round(self.rate, 3),
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "waiting": len(self._waiters),
+                "wait_seconds": round(self.waited, 2),
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def provider_limits(provider):
+    """
+    Rate and burst for a provider: PROVIDER_LIMITS, overridden by
+    <PROVIDER>_RATE / <PROVIDER>_BURST settings
+    """
+    prefix = provider.upper().replace(".", "_")
+    limits = dict(PROVIDER_LIMITS[provider])
+    rate = config.get_setting(f"{prefix}_RATE")
+    burst = config.get_setting(f"{prefix}_BURST")
+    if rate:
+        limits["rate"] = float(rate)
+    if burst:
+        limits["burst"] = int(burst)
+    return limits
+
+
+def get_limiter(provider):
+    """
+    Return the process-wide limiter for a provider
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = AdaptiveRateLimiter(provider, **provider_limits(provider))
+        return _limiters[provider]
+
+
+def configure_limiter(provider, rate=None, burst=None):
+    """
+    Replace a provider's limiter with a fresh one at the given limits
+    (defaulting to provider_limits())
+    """
+    limits = provider_limits(provider)
+    if rate is not None:
+        limits["rate"] = rate
+    if burst is not None:
+        limits["burst"] = burst
+    with _limiters_lock:
+        _limiters[provider] = AdaptiveRateLimiter(provider, **limits)
+        return _limiters[provider]
+
+
+def reset_limiters():
+    """
+    Drop every limiter, so the next request starts from the configured limits
+    """
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def limiter_stats():
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.stats() for provider, limiter in limiters.items()}
+
+
+class ReelUsage:
+    """
+    Per-reel API accounting: calls, failures, billable units and estimated
+    spend per provider. Also carries the reel's scheduling priority to the
+    rate limiters.
+    """
+
+    def __init__(self, priority=PRIORITY_INTERACTIVE):
+        self.priority = priority
+        self.providers = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider, units=0, ok=True):
+        with self._lock:
+            entry = self.providers.setdefault(provider, {"calls": 0, "errors": 0, "units": 0, "cost": 0.0})
+            entry["calls"] += 1
+            if not ok:
+                entry["errors"] += 1
+            entry["units"] += units
+            entry["cost"] += units * UNIT_COSTS.get(provider, 0.0)
+
+    @property
+    def cost(self):
+        with self._lock:
+            return sum(entry["cost"] for entry in self.providers.values())
+
+    def summary(self):
+        with self._lock:
+            providers = {provider: dict(entry) for provider, entry in self.providers.items()}
+        return {"priority": self.priority, "cost": sum(entry["cost"] for entry in providers.values()),
+                "providers": providers}
@@ -0,0 +1,133 @@
+import json
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .job_queue import JOB_STATUSES
+from .rate_limit import PRIORITIES
+from .video_generator import ENCODE_PROFILE, ENCODE_PROFILES, OUTPUT_VARIANTS
+
+# Job options a client may set when submitting a reel
+JOB_OPTIONS = ("force", "streaming", "encode_profile", "variants", "no_cache", "refresh_cache")
+# Job options that are on/off switches and must be JSON booleans
+BOOLEAN_OPTIONS = ("force", "streaming", "no_cache", "refresh_cache")
+
+
+def parse_job_options(payload):
+    """
+    Validate the options of a POST /jobs payload. Returns (options, priority
+    name); raises ValueError with a message for the client on any value of
+    the wrong type or outside its choices.
+    """
+    for name in BOOLEAN_OPTIONS:
+        if name in payload and not isinstance(payload[name], bool):
+            raise ValueError(f"{name} must be true or false")
+
+    encode_profile = payload.get("encode_profile", ENCODE_PROFILE)
+    if not isinstance(encode_profile, str) or encode_profile not in ENCODE_PROFILES:
+        raise ValueError(f"encode_profile must be one of {sorted(ENCODE_PROFILES)}")
+
+    variants = payload.get("variants", [])
+    if not isinstance(variants, list) or not all(
+            isinstance(variant, str) and variant in OUTPUT_VARIANTS for variant in variants):
+        raise ValueError(f"variants must be a list of {sorted(OUTPUT_VARIANTS)}")
+
+    priority = payload.get("priority", "interactive")
+    if not isinstance(priority, str) or priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {sorted(PRIORITIES)}")
+
+    return {name: payload[name] for name in JOB_OPTIONS if name in payload}, priority
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    JSON API for the reel service:
+
+        POST /jobs        {"url": ..., "force": false, "streaming": false, "encode_profile": "still",
+                           "no_cache": false, "refresh_cache": false,
+                           "variants": ["preview", ...], "priority": "interactive" | "batch"}
+        GET  /jobs        recent jobs, optionally ?status=queued
+        GET  /jobs/<id>   one job
+        GET  /status      queue depth, running jobs, concurrency limits and rate limiters
+    """
+    protocol_version = "HTTP/1.1"
+    queue = None
+    status = None
+    notify = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, indent=2).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def do_GET(self):
+        request = urlparse(self.path)
+        parts = [part for part in request.path.split("/") if part]
+
+        if parts == ["status"]:
+            self._send_json(200, self.status())
+        elif parts == ["jobs"]:
+            status = parse_qs(request.query).get("status", [None])[0]
+            if status and status not in JOB_STATUSES:
+                self._send_json(400, {"error": f"status must be one of {JOB_STATUSES}"})
+                return
+            self._send_json(200, self.queue.list(status=status))
+        elif len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            job = self.queue.get(int(parts[1]))
+            if job is None:
+                self._send_json(404, {"error": "no such job"})
+            else:
+                self._send_json(200, job)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": "body must be JSON"})
+            return
+        url = payload.get("url") if isinstance(payload, dict) else None
+        if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+            self._send_json(400, {"error": "an http(s) url is required"})
+            return
+
+        try:
+            options, priority = parse_job_options(payload)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        job = self.queue.enqueue(url, options, priority=PRIORITIES[priority])
+        self.notify()
+        self._send_json(201, job)
+
+
+def start_service_server(queue, status, notify, host="127.0.0.1", port=8080):
+    """
+    Serve the job API on a background thread; returns (server, base_url).
+    status() returns the /status payload and notify() is called after each
+    new job so idle workers wake up immediately.
+    """
+    handler = type("ConfiguredServiceHandler", (ServiceHandler,), {
+        "queue": queue,
+        "status": staticmethod(status),
+        "notify": staticmethod(notify),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -1,4 +1,11 @@
-from .tts import generate_audio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .tts import generate_audio, audio_cache
+from .manifest import write_manifest, MANIFEST_PATH
+
+# Number of scenes synthesised concurrently
+TTS_WORKERS = 4
 
 
 def format_time(seconds):
@@ -10,46 +17,89 @@ def format_time(seconds):
     return time_formatted
 
 
-def generate_audio_and_subtitle(json_output, output_srt_path="subtitles.srt"):
+def synthesize_scene_audio(item, use_cache=True, refresh_cache=False, audio_dir='audios', usage=None):
     """
-    Generate an SRT file based on the text and audio durations
+    Generate the audio for a single scene and return its duration
     """
-    try:
-        subtitles = []
-        current_time = 0.0  # Start from 0 seconds
+    print(f"Generating audio for scene {item['scene_number']}")
+    return generate_audio(item["text"], item["scene_number"], use_cache=use_cache, refresh_cache=refresh_cache,
+                          output_dir=audio_dir, usage=usage)
+
+
+def write_subtitles_and_manifest(json_output, durations, output_srt_path="subtitles.srt",
+                                 manifest_path=MANIFEST_PATH, audio_dir='audios'):
+    """
+    Write the SRT file and manifest from per-scene durations, in scene order.
+    Scenes without a duration are left out. Returns the manifest.
+    """
+    subtitles = []
+    manifest = []
+    current_time = 0.0  # Start from 0 seconds
+
+    # Process each item
+    for item, duration in zip(json_output, durations):
+        scene_number = item["scene_number"]
+        text = item["text"]
+
+        if duration:
+            # Calculate start and end times
+            start_time = current_time
+            end_time = current_time + duration
 
-        # Process each item
-        for item in json_output:
-            scene_number = item["scene_number"]
-            text = item["text"]
+            # Format times in HH:MM:SS,mmm format
+            start_time_formatted = format_time(start_time)
+            end_time_formatted = format_time(end_time)
 
-            print(f"Generating audio for scene {scene_number}")
-            duration = generate_audio(text, scene_number)
+            # Append the subtitle entry
+            subtitles.append(f"{scene_number}")
+            subtitles.append(
+                f"{start_time_formatted} --> {end_time_formatted}")
+            subtitles.append(text)
+            subtitles.append("")  # Blank line
 
-            if duration:
-                # Calculate start and end times
-                start_time = current_time
-                end_time = current_time + duration
+            # Update current time
+            current_time = end_time
 
-                # Format times in HH:MM:SS,mmm format
-                start_time_formatted = format_time(start_time)
-                end_time_formatted = format_time(end_time)
+            manifest.append({
+                "scene_number": scene_number,
+                "audio_path": os.path.join(audio_dir, f"scene{scene_number}.mp3"),
+                "duration": duration,
+                "text": text,
+            })
 
-                # Append the subtitle entry
-                subtitles.append(f"{scene_number}")
-                subtitles.append(
-                    f"{start_time_formatted} --> {end_time_formatted}")
-                subtitles.append(text)
-                subtitles.append("")  # Blank line
+    # Write to SRT file
+    with open(output_srt_path, "w", encoding="utf-8") as srt_file:
+        srt_file.write("\n".join(subtitles))
+    print(f"SRT file generated successfully: {output_srt_path}")
 
-                # Update current time
-                current_time = end_time
+    write_manifest(manifest, manifest_path)
+    return manifest
 
-        # Write to SRT file
-        with open(output_srt_path, "w", encoding="utf-8") as srt_file:
-            srt_file.write("\n".join(subtitles))
-        print(f"SRT file generated successfully: {output_srt_path}")
+
+def generate_audio_and_subtitle(json_output, output_srt_path="subtitles.srt", max_workers=TTS_WORKERS, executor=None,
+                                use_cache=True, refresh_cache=False, manifest_path=MANIFEST_PATH, audio_dir='audios',
+                                usage=None):
+    """
+    Generate an SRT file based on the text and audio durations.
+    Returns the per-scene manifest (also written to manifest_path) so the video
+    stage can reuse the measured durations instead of probing the audio again.
+    """
+    try:
+        def synthesize(item):
+            return synthesize_scene_audio(item, use_cache=use_cache, refresh_cache=refresh_cache, audio_dir=audio_dir,
+                                          usage=usage)
+
+        # Synthesise every scene in parallel; map() keeps the results in scene order
+        if executor is not None:
+            durations = list(executor.map(synthesize, json_output))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                durations = list(pool.map(synthesize, json_output))
+
+        if use_cache:
+            print("Audio cache:", audio_cache.stats())
+
+        return write_subtitles_and_manifest(json_output, durations, output_srt_path, manifest_path, audio_dir)
 
     except Exception as e:
         print(f"Error generating SRT file: {e}")
-
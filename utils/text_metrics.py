@@ -0,0 +1,124 @@
+import os
+import shutil
+import string
+import subprocess
+from functools import lru_cache
+
+# Fonts tried when no font file is configured, before fontconfig's "Sans"
+DEFAULT_FONTS = ["DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"]
+
+
+@lru_cache(maxsize=None)
+def fontconfig_sans():
+    """
+    The file fontconfig resolves "Sans" to, or None without fc-match
+    """
+    if not shutil.which("fc-match"):
+        return None
+    result = subprocess.run(["fc-match", "-f", "%{file}", "Sans"], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+@lru_cache(maxsize=None)
+def load_font(font_size, font_path=None):
+    """
+    Load a font once per (size, path). Falls back to PIL's built-in font,
+    which has no file, only when none of the candidates can be opened.
+    """
+    from PIL import ImageFont
+
+    candidates = [font_path] if font_path else DEFAULT_FONTS + [fontconfig_sans()]
+    for candidate in filter(None, candidates):
+        try:
+            return ImageFont.truetype(candidate, font_size)
+        except OSError:
+            continue
+    return ImageFont.load_default(font_size)
+
+
+def font_file(font_size, font_path=None):
+    """
+    Absolute path of the font file load_font() measures with, or None for
+    PIL's built-in font
+    """
+    path = getattr(load_font(font_size, font_path), "path", None)
+    return os.path.abspath(path) if isinstance(path, str) else None
+
+
+class GlyphAdvanceTable:
+    """
+    Horizontal advance of every glyph of one font at one size, measured once
+    with the real font so that text widths can be summed without rasterising.
+    Printable ASCII is measured up front; other characters on first use.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.advances = {}
+        self._measure(string.printable)
+        ascent, descent = font.getmetrics()
+        self.line_height = ascent + descent
+
+    def _measure(self, characters):
+        for character in characters:
+            if character not in self.advances:
+                self.advances[character] = self.font.getlength(character)
+
+    def width(self, text):
+        advances = self.advances
+        try:
+            return sum(map(advances.__getitem__, text))
+        except KeyError:
+            self._measure(text)
+            return sum(map(advances.__getitem__, text))
+
+    def widths(self, words):
+        """
+        Widths of many words in one pass
+        """
+        self._measure({character for word in words for character in word} - self.advances.keys())
+        advances = self.advances
+        return [sum(map(advances.__getitem__, word)) for word in words]
+
+
+@lru_cache(maxsize=None)
+def glyph_table(font_size, font_path=None):
+    """
+    Return the shared advance table for a (font, size)
+    """
+    return GlyphAdvanceTable(load_font(font_size, font_path))
+
+
+@lru_cache(maxsize=4096)
+def wrap_lines(text, max_width, font_size, font_path=None):
+    """
+    Greedily wrap text into lines no wider than max_width pixels, measured
+    with the font's real glyph advances. A single word wider than max_width
+    gets a line of its own. Memoized per (text, width, font, size).
+    """
+    table = glyph_table(font_size, font_path)
+    space_width = table.width(" ")
+    words = text.split()
+
+    lines = []
+    current_line = []
+    current_line_width = 0
+
+    for word, word_width in zip(words, table.widths(words)):
+        # Width of the line if this word (and the space before it) were added
+        candidate_width = current_line_width + (space_width if current_line else 0) + word_width
+
+        if candidate_width <= max_width or not current_line:
+            current_line.append(word)
+            current_line_width = candidate_width
+        else:
+            lines.append(' '.join(current_line))
+            current_line = [word]
+            current_line_width = word_width
+
+    if current_line:
+        lines.append(' '.join(current_line))
+
+    return tuple(lines)
@@ -1,63 +1,94 @@
 import os
-import requests
-import subprocess
-from dotenv import load_dotenv
+import shutil
 
-# Load environment variables from .env file
-load_dotenv()
+from .cache import DiskCache, hash_text
+from .audio_probe import probe_duration
+from . import config, http_client
+from .instrumentation import tracer
+from .rate_limit import get_limiter, PRIORITY_INTERACTIVE
 
-# Retrieve the API key
-DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+TTS_MODEL = "aura-asteria-en"
 
-if not DEEPGRAM_API_KEY:
-    raise ValueError("Missing DEEPGRAM_API_KEY in environment variables.")
 
+def request_headers():
+    return {
+        'Authorization': f'Token {config.deepgram_api_key()}',
+        'Content-Type': 'text/plain'
+    }
 
-url = "https://api.deepgram.com/v1/speak?model=aura-asteria-en"
-headers = {
-    'Authorization': f'Token {DEEPGRAM_API_KEY}',
-    'Content-Type': 'text/plain'
-}
+
+# Synthesised narration keyed by (voice model, text hash), with its duration as metadata
+audio_cache = DiskCache(namespace="audio", max_bytes=512 * 1024 ** 2)
 
 
 def get_audio_length(audio_path):
     """
-    Get the duration of an audio file using FFmpeg
+    Get the duration of an audio file from its MP3 frame headers
+    """
+    duration = probe_duration(audio_path)
+    return duration or 0
+
+
+def restore_cached_audio(key, audio_path):
+    """
+    Copy cached narration to audio_path and return its stored duration, or None on a miss
+    """
+    cached_path = audio_cache.get_path(key)
+    if cached_path is None:
+        return None
+    meta = audio_cache.get_meta(key) or {}
+    if not meta.get("duration"):
+        return None
+    shutil.copyfile(cached_path, audio_path)
+    return meta["duration"]
+
+
+def generate_audio(text, scene, use_cache=True, refresh_cache=False, output_dir='audios', usage=None):
+    """
+    Synthesise a scene's narration to {output_dir}/scene{scene}.mp3 and return its duration.
+    With use_cache, unchanged text is served from the audio cache without any
+    network call or ffprobe; refresh_cache forces re-synthesis and overwrites the entry.
+    Requests are rate limited at usage's priority and billed to usage (a ReelUsage), if given.
     """
-    try:
-        command = [
-            "ffprobe", "-i", audio_path,
-            "-show_entries", "format=duration",
-            "-v", "quiet", "-of", "csv=p=0"
-        ]
-        result = subprocess.run(
-            command, capture_output=True, text=True, check=True)
-        return float(result.stdout.strip())
-    except Exception as e:
-        print(f"Error getting audio duration: {e}")
-        return 0
-
-
-def generate_audio(text, scene):
     if not text or not scene:
         return None
     
     # Create audios directory if it doesn't exist
-    os.makedirs('audios', exist_ok=True)
-    
-    # Make the request
-    response = requests.request("POST", url, headers=headers, data=text)
-    
+    os.makedirs(output_dir, exist_ok=True)
+    audio_path = os.path.join(output_dir, f'scene{scene}.mp3')
+
+    key = DiskCache.make_key(TTS_MODEL, hash_text(text))
+    if use_cache and not refresh_cache:
+        with tracer.span("tts.cache", category="cache", scene=scene) as span:
+            duration = restore_cached_audio(key, audio_path)
+            span["hit"] = bool(duration)
+        if duration:
+            print(f"Using cached audio for scene {scene}")
+            return duration
+
+    # Make the request, streaming the MP3 straight to disk
+    with tracer.span("tts.request", category="api", scene=scene, chars=len(text)) as span:
+        response = http_client.request(
+            "POST", f"{config.deepgram_base_url()}/v1/speak?model={TTS_MODEL}", headers=request_headers(), data=text,
+            stream=True, limiter=get_limiter("deepgram.tts"),
+            priority=usage.priority if usage else PRIORITY_INTERACTIVE)
+        span["status"] = response.status_code
+        if response.status_code == 200:
+            span["bytes"], digest = http_client.stream_to_file(response, audio_path, hash_name="sha256")
+
+    if usage:
+        usage.record("deepgram.tts", units=len(text) if response.status_code == 200 else 0,
+                     ok=response.status_code == 200)
+
     if response.status_code == 200:
-        # Save the content as an MP3 file
-        audio_path = f'audios/scene{scene}.mp3'
-        with open(audio_path, 'wb') as f:
-            f.write(response.content)
         print(f"Audio file saved successfully as '{audio_path}'")
         
         # Get the length of the audio
         duration = get_audio_length(audio_path)
+        if use_cache and duration:
+            audio_cache.put_file(key, audio_path, meta={"duration": duration, "sha256": digest})
         return duration
     else:
-        print(f"Error: {response.text}")
+        print(f"TTS for scene {scene} failed with status {response.status_code}: {response.text[:500]}")
+        response.close()
         return None
@@ -1,7 +1,16 @@
 import os
+import re
+import json
+import shutil
+import hashlib
 import subprocess
-from PIL import Image
-import pysrt  # Add this import for SRT parsing
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .audio_probe import probe_duration
+from .cache import DiskCache, hash_file
+from .instrumentation import tracer, run_subprocess
+from .text_metrics import load_font, font_file, glyph_table, wrap_lines
 
 # Configuration variables remain the same
 FONT_SIZE = 50
@@ -12,11 +21,81 @@ SUBTITLE_MARGIN = 30
 SUBTITLE_VERTICAL_ALIGNMENT = "bottom"
 ADD_SUBTITLES = True
 
+# How subtitles are drawn: "drawtext" chains one FFmpeg drawtext filter per
+# line (glyphs are rasterised on every frame); "overlay" rasterises the
+# caption once to a transparent PNG and composites it with a single overlay
+# filter; "baked" draws the caption straight into the still image.
+SUBTITLE_MODE = "drawtext"
+# TrueType font for pre-rendered captions; None tries DejaVuSans, then PIL's default font
+FONT_PATH = None
+
+# Output frame size
+VIDEO_WIDTH = 1080
+VIDEO_HEIGHT = 1920
+
+# Image preprocessing: worker processes, how early to switch from reduce() to
+# LANCZOS on large downscales, and JPEG encoder settings. Lower quality (e.g.
+# {"quality": 90}) gives smaller, faster-to-write stills.
+PREPROCESS_WORKERS = os.cpu_count() or 1
+REDUCING_GAP = 2.0
+JPEG_SETTINGS = {"quality": 100}
+PREPROCESS_KEYS_FILE = ".preprocess_keys.json"
+# Preprocess workers are started from a clean server process rather than
+# forked from a parent whose HTTP, TTS and ffmpeg threads may hold locks
+PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Scene encodes run in parallel; each x264 encoder is capped at X264_THREADS
+# so that RENDER_JOBS * X264_THREADS roughly matches the available cores.
+X264_THREADS = 4
+RENDER_JOBS = max(1, (os.cpu_count() or 1) // X264_THREADS)
+
+# "segments" encodes each scene to a temp MP4 and stream-copies them together;
+# "single_pass" renders every scene through one filter_complex graph in a
+# single FFmpeg process with no intermediate files.
+RENDER_MODE = "segments"
+
+# x264/AAC settings per encode profile. Every scene is a looped still with
+# fades, so "still" tunes x264 for static content (stillimage tune, long GOP,
+# cheap motion search); "draft" trades quality for speed in preview renders
+# and "final" spends more encoder time for the smallest, cleanest output.
+ENCODE_PROFILES = {
+    "still": {
+        "preset": "fast", "tune": "stillimage", "crf": 23, "gop": 300,
+        "x264_params": "me=dia:subme=4:ref=1", "audio_bitrate": "192k",
+    },
+    "draft": {
+        "preset": "ultrafast", "tune": "stillimage", "crf": 30, "gop": 300,
+        "x264_params": None, "audio_bitrate": "96k",
+    },
+    "final": {
+        "preset": "slow", "tune": "stillimage", "crf": 18, "gop": 150,
+        "x264_params": None, "audio_bitrate": "384k",
+    },
+}
+ENCODE_PROFILE = "still"
+FRAME_RATE = 30
+
+# Output variants a reel can be published in. Each overrides the defaults of
+# output_target(): full-size, the requested encode profile, with audio and
+# subtitles. Variants are rendered from one shared master per subtitle setting.
+OUTPUT_VARIANTS = {
+    "final": {},
+    "preview": {"width": 720, "height": 1280, "profile": "draft"},
+    "muted": {"audio": False},
+    "clean": {"subtitles": False},
+}
+
+# Encoded scene segments keyed by everything that goes into them, so a re-render
+# only re-encodes the scenes whose image, narration, caption or settings changed
+segment_cache = DiskCache(namespace="segments", max_bytes=4 * 1024 ** 3)
+
 
 def read_srt_file(srt_file):
     """
     Read subtitles from SRT file
     """
+    import pysrt
+
     try:
         subs = pysrt.open(srt_file)
         return [sub.text.replace('\n', ' ') for sub in subs]
@@ -27,49 +106,24 @@ def read_srt_file(srt_file):
 
 def wrap_text(text, max_width, font_size=FONT_SIZE, font_path=None):
     """
-    Improved text wrapping function with more conservative width estimates
-    and better handling of long sentences
+    Wrap text to max_width pixels using the caption font's real glyph metrics
     """
-    # Reduce the max_width to account for padding and safety margin
-    effective_width = max_width * 0.8  # Use only 80% of max width to ensure text fits
-
-    # Approximate character width (more conservative estimate)
-    char_width = font_size * 0.6  # Increased from 0.5 to 0.6 for better estimation
-    space_width = font_size * 0.3  # Reduced space width for better word spacing
-
-    lines = []
-    current_line = []
-    current_line_width = 0
+    return list(wrap_lines(text, max_width, font_size, font_path or FONT_PATH))
 
-    words = text.split()
 
-    for word in words:
-        # Calculate word width including trailing space
-        word_width = len(word) * char_width + space_width
-
-        # Check if adding this word would exceed the line width
-        if current_line_width + word_width <= effective_width:
-            current_line.append(word)
-            current_line_width += word_width
-        else:
-            # If the current line would be too long, start a new line
-            if current_line:
-                lines.append(' '.join(current_line))
-            current_line = [word]
-            current_line_width = word_width
-
-    # Don't forget the last line
-    if current_line:
-        lines.append(' '.join(current_line))
-
-    return lines
+def line_height(font_size=FONT_SIZE, font_path=None):
+    """
+    Height of one caption line (ascent + descent) in the caption font
+    """
+    return glyph_table(font_size, font_path or FONT_PATH).line_height
 
 
-def calculate_vertical_position(total_lines, font_size, line_spacing, video_height, alignment):
+def calculate_vertical_position(total_lines, font_size, line_spacing, video_height, alignment, font_path=None):
     """
     Calculate vertical position based on alignment
     """
-    total_height = total_lines * font_size + (total_lines - 1) * line_spacing
+    text_line_height = line_height(font_size, font_path)
+    total_height = total_lines * text_line_height + (total_lines - 1) * line_spacing
     margin = SUBTITLE_MARGIN
 
     if alignment == "top":
@@ -82,16 +136,16 @@ def calculate_vertical_position(total_lines, font_size, line_spacing, video_heig
         raise ValueError("Invalid subtitle alignment")
 
 
-def preprocess_image_if_needed(input_path, output_path):
+def preprocess_image_if_needed(input_path, output_path, target_width=VIDEO_WIDTH, target_height=VIDEO_HEIGHT,
+                               encoder_settings=None):
     """
     Fit image into vertical 16:9 format (1080x1920) while maintaining aspect ratio
     """
+    from PIL import Image
+
     img = Image.open(input_path)
     width, height = img.size
 
-    target_width = 1080
-    target_height = 1920
-
     width_ratio = target_width / width
     height_ratio = target_height / height
 
@@ -100,184 +154,818 @@ def preprocess_image_if_needed(input_path, output_path):
     new_width = int(width * scale_ratio)
     new_height = int(height * scale_ratio)
 
-    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    # Let the JPEG decoder downscale by a power of two while decoding large sources
+    if img.format == "JPEG" and scale_ratio < 0.5:
+        img.draft("RGB", (new_width, new_height))
+
+    # reducing_gap does a cheap integer reduce() first on large downscales and
+    # only runs LANCZOS over the last (at most 2x) step
+    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
 
     new_img = Image.new('RGB', (target_width, target_height), (0, 0, 0))
     paste_x = (target_width - new_width) // 2
     paste_y = (target_height - new_height) // 2
 
     new_img.paste(img, (paste_x, paste_y))
-    new_img.save(output_path, quality=100)
+    new_img.save(output_path, **(encoder_settings or JPEG_SETTINGS))
+
+
+def preprocess_cache_key(input_path, target_width, target_height, encoder_settings):
+    """
+    Key a preprocessed image by its source content, target geometry and encoder settings
+    """
+    digest = hashlib.sha256()
+    with open(input_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    settings = json.dumps([target_width, target_height, encoder_settings], sort_keys=True)
+    digest.update(settings.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def scene_number(filename):
+    """
+    Scene number of an image{n} file, or None if the name has none
+    """
+    match = re.search(r"(\d+)", filename)
+    return int(match.group(1)) if match else None
+
+
+def scene_sort_key(filename):
+    """
+    Sort image{n} files by scene number so that image10 follows image9
+    """
+    number = scene_number(filename)
+    return (float("inf") if number is None else number, filename)
+
+
+def process_pool(workers=PREPROCESS_WORKERS):
+    """
+    Process pool for image preprocessing, started with PROCESS_START_METHOD
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(PROCESS_START_METHOD))
+
+
+def preprocess_keyed_image(input_path, output_path, target_width=VIDEO_WIDTH, target_height=VIDEO_HEIGHT,
+                           encoder_settings=None):
+    """
+    Preprocess one image outside preprocess_images() and return the cache key
+    to record for it in the output directory's keys file
+    """
+    encoder_settings = encoder_settings or JPEG_SETTINGS
+    preprocess_image_if_needed(input_path, output_path, target_width, target_height, encoder_settings)
+    return preprocess_cache_key(input_path, target_width, target_height, encoder_settings)
+
+
+def read_preprocess_keys(output_dir):
+    """
+    Cache keys of the preprocessed images in output_dir, by output file name
+    """
+    try:
+        with open(os.path.join(output_dir, PREPROCESS_KEYS_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_preprocess_keys(output_dir, keys):
+    with open(os.path.join(output_dir, PREPROCESS_KEYS_FILE), "w", encoding="utf-8") as f:
+        json.dump(keys, f, indent=2)
 
 
-def preprocess_images(input_dir, output_dir):
+def preprocess_images(input_dir, output_dir, executor=None, workers=PREPROCESS_WORKERS,
+                      target_width=VIDEO_WIDTH, target_height=VIDEO_HEIGHT, encoder_settings=None):
     """
-    Prepare images for FFmpeg
+    Prepare images for FFmpeg. Images are letterboxed across a process pool and
+    an output is only regenerated when its source content, geometry or encoder
+    settings change. Each output is named after its source's scene number
+    (image3.png -> image3.jpg), so a missing image leaves a gap instead of
+    shifting every later scene.
     """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    image_count = 1
-    for filename in sorted(os.listdir(input_dir)):
+    encoder_settings = encoder_settings or JPEG_SETTINGS
+    previous_keys = read_preprocess_keys(output_dir)
+
+    keys = {}
+    pending = []
+    for filename in sorted(os.listdir(input_dir), key=scene_sort_key):
         if filename.endswith((".jpg", ".jpeg", ".png")):
+            number = scene_number(filename)
+            if number is None:
+                print(f"Skipping {filename}: no scene number in its name")
+                continue
             input_path = os.path.join(input_dir, filename)
-            output_path = os.path.join(output_dir, f"image{image_count}.jpg")
+            output_name = f"image{number}.jpg"
+            output_path = os.path.join(output_dir, output_name)
+
+            key = preprocess_cache_key(input_path, target_width, target_height, encoder_settings)
+            keys[output_name] = key
+            if previous_keys.get(output_name) != key or not os.path.exists(output_path):
+                pending.append((input_path, output_path))
+
+    # A scene whose image is gone must not pick up the still from an earlier run
+    for stale in set(previous_keys) - set(keys):
+        stale_path = os.path.join(output_dir, stale)
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+    def run(pool):
+        futures = [
+            pool.submit(preprocess_image_if_needed, input_path, output_path,
+                        target_width, target_height, encoder_settings)
+            for input_path, output_path in pending
+        ]
+        for future in futures:
+            future.result()
 
-            if not os.path.exists(output_path):
-                preprocess_image_if_needed(input_path, output_path)
+    with tracer.span("preprocess", images=len(keys), processed=len(pending)):
+        if pending:
+            print(f"Preprocessing {len(pending)} image(s)...")
+            if executor is not None:
+                run(executor)
+            elif len(pending) == 1 or workers <= 1:
+                for input_path, output_path in pending:
+                    preprocess_image_if_needed(input_path, output_path, target_width, target_height, encoder_settings)
+            else:
+                with process_pool(workers) as pool:
+                    run(pool)
 
-            image_count += 1
+    write_preprocess_keys(output_dir, keys)
 
 
 def get_audio_duration(audio_path):
     """
-    Get the duration of an audio file using FFmpeg
+    Get the duration of an audio file by parsing its MP3 frame headers
+    (only falls back to ffprobe for non-MP3 input)
     """
-    try:
-        command = [
-            "ffmpeg", "-i", audio_path,
-            "-vn", "-f", "null", "-"
-        ]
-        result = subprocess.run(command, stderr=subprocess.PIPE, text=True)
-
-        for line in result.stderr.splitlines():
-            if "Duration" in line:
-                duration_str = line.split()[1].rstrip(',')
-                h, m, s = duration_str.split(":")
-                return float(h) * 3600 + float(m) * 60 + float(s)
-        print(f"Duration not found in FFmpeg output for {audio_path}")
-        return None
-    except Exception as e:
-        print(f"Error getting audio duration: {e}")
+    duration = probe_duration(audio_path)
+    if duration is None:
+        print(f"Duration not found for {audio_path}")
+    return duration
+
+
+class SceneEncodeError(Exception):
+    """
+    Raised when the FFmpeg encode of a single scene fails
+    """
+
+    def __init__(self, scene_number, returncode, stderr):
+        self.scene_number = scene_number
+        self.returncode = returncode
+        self.stderr = stderr
+        last_lines = "\n".join(stderr.strip().splitlines()[-5:]) if stderr else ""
+        super().__init__(
+            f"Scene {scene_number} failed to encode (exit code {returncode}):\n{last_lines}")
+
+
+def build_subtitle_filter(subtitle_text, audio_duration):
+    """
+    Build the drawtext filter chain for a scene's subtitle
+    """
+    wrapped_subtitles = wrap_text(subtitle_text, max_width=VIDEO_WIDTH - 40)
+
+    print(f"Wrapped subtitles: {wrapped_subtitles}")
+
+    if not wrapped_subtitles:
+        return "null"
+
+    filter_complex = []
+    line_spacing = 20
+    video_height = VIDEO_HEIGHT
+    total_lines = len(wrapped_subtitles)
+    text_line_height = line_height()
+    vertical_position = calculate_vertical_position(
+        total_lines, FONT_SIZE, line_spacing, video_height, SUBTITLE_VERTICAL_ALIGNMENT)
+    # Draw with the same font file the line widths were measured with; only
+    # PIL's built-in font (no file) leaves drawtext to pick its own
+    measured_font = font_file(FONT_SIZE, FONT_PATH)
+    font_option = ""
+    if measured_font:
+        escaped_font = measured_font.replace("'", "'\\''").replace(":", "\\:")
+        font_option = f"fontfile='{escaped_font}':"
+
+    # expansion=none draws the text literally, so a "%" in a caption ("prices
+    # rose 5%") is not parsed as a drawtext %{...} function
+    for idx, seg_text in enumerate(wrapped_subtitles):
+        seg_text = seg_text.replace(
+            "'", "'\\''").replace(":", "\\:")
+        y_position = vertical_position + \
+            (text_line_height + line_spacing) * idx
+
+        filter_complex.append(
+            f"drawtext={font_option}text='{seg_text}':expansion=none:fontcolor={FONT_COLOR}:fontsize={FONT_SIZE}:"
+            f"box=1:boxcolor=black@0.5:boxborderw=5:"
+            f"x={SUBTITLE_X_POSITION}:y={y_position}:line_spacing={line_spacing}:"
+            f"fix_bounds=true:enable='between(t,0,{audio_duration})'"
+        )
+
+    return ','.join(filter_complex)
+
+
+def render_subtitle_overlay(subtitle_text, output_path, width=VIDEO_WIDTH, height=VIDEO_HEIGHT):
+    """
+    Rasterise a scene's wrapped caption once to a transparent RGBA PNG, using the
+    same layout as the drawtext chain. Returns the PNG path, or None if there is no text.
+    """
+    from PIL import Image, ImageDraw
+
+    wrapped_subtitles = wrap_text(subtitle_text, max_width=width - 40)
+    if not wrapped_subtitles:
         return None
 
+    font = load_font(FONT_SIZE, FONT_PATH)
+    text_line_height = line_height()
+    line_spacing = 20
+    box_border = 5
+    vertical_position = calculate_vertical_position(
+        len(wrapped_subtitles), FONT_SIZE, line_spacing, height, SUBTITLE_VERTICAL_ALIGNMENT)
+
+    overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    for idx, line in enumerate(wrapped_subtitles):
+        y_position = vertical_position + (text_line_height + line_spacing) * idx
+        text_width = font.getlength(line)
+        x_position = max(0, (width - text_width) / 2)
+        draw.rectangle(
+            [x_position - box_border, y_position - box_border,
+             x_position + text_width + box_border, y_position + text_line_height + box_border],
+            fill=(0, 0, 0, 128))
+        draw.text((x_position, y_position), line, font=font, fill=FONT_COLOR)
+
+    overlay.save(output_path)
+    return output_path
+
+
+def bake_subtitles(image_path, overlay_path, output_path):
+    """
+    Composite a caption overlay into a copy of the scene's still
+    """
+    from PIL import Image
+
+    image = Image.open(image_path).convert("RGBA")
+    image.alpha_composite(Image.open(overlay_path).convert("RGBA"))
+    image.convert("RGB").save(output_path, **JPEG_SETTINGS)
+    return output_path
 
-def create_video_with_audio_and_subtitles(output_dir, audio_dir, output_video):
+
+def scene_fades(audio_duration):
+    return f"fade=t=in:st=0:d=1,fade=t=out:st={audio_duration-1}:d=1"
+
+
+def encode_options(profile=ENCODE_PROFILE, audio=True):
     """
-    Create video with audio and subtitles using CPS-based timing
+    FFmpeg video/audio codec arguments for an encode profile; audio=False drops the audio stream
     """
-    try:
-        base_dir = os.getcwd()
-        concat_list_path = os.path.join(base_dir, "concat_list.txt")
-        subtitles = read_srt_file('subtitles.srt')
-
-        with open(concat_list_path, "w", encoding='utf-8') as f:
-            scene_count = len(
-                [x for x in os.listdir(audio_dir) if x.endswith('.mp3')])
-            print(f"Found {scene_count} audio files")
-
-            for i in range(1, scene_count + 1):
-                image_path = os.path.join(output_dir, f"image{i}.jpg")
-                audio_path = os.path.join(audio_dir, f"scene{i}.mp3")
-                temp_video = os.path.join(base_dir, f"temp_scene_{i}.mp4")
-
-                if not os.path.exists(image_path) or not os.path.exists(audio_path):
-                    print(f"Missing files for scene {i}")
-                    continue
-
-                audio_duration = get_audio_duration(audio_path)
-                if audio_duration is None:
-                    print(f"Could not determine duration for {audio_path}")
-                    continue
-
-                print(f"Processing scene {i} with duration {audio_duration} seconds")
-
-                if ADD_SUBTITLES:
-                    subtitle_text = subtitles[i -
-                                              1] if i - 1 < len(subtitles) else ""
-                    wrapped_subtitles = wrap_text(
-                        subtitle_text, max_width=1080 - 40)
-
-                    print(f"Wrapped subtitles for scene {i}: {wrapped_subtitles}")
-
-                    if not wrapped_subtitles:
-                        filter_str = "null"
-                    else:
-                        filter_complex = []
-                        line_spacing = 20
-                        video_height = 1920
-                        total_lines = len(wrapped_subtitles)
-                        vertical_position = calculate_vertical_position(
-                            total_lines, FONT_SIZE, line_spacing, video_height, SUBTITLE_VERTICAL_ALIGNMENT)
-
-                        for idx, seg_text in enumerate(wrapped_subtitles):
-                            seg_text = seg_text.replace(
-                                "'", "'\\''").replace(":", "\\:")
-                            y_position = vertical_position + \
-                                (FONT_SIZE + line_spacing) * idx
-
-                            filter_complex.append(
-                                f"drawtext=text='{seg_text}':fontcolor={FONT_COLOR}:fontsize={FONT_SIZE}:"
-                                f"box=1:boxcolor=black@0.5:boxborderw=5:"
-                                f"x={SUBTITLE_X_POSITION}:y={y_position}:line_spacing={line_spacing}:"
-                                f"fix_bounds=true:enable='between(t,0,{audio_duration})'"
-                            )
-
-                        filter_str = ','.join(filter_complex)
-                else:
-                    filter_str = "null"
-
-
-                command = [
-                    "ffmpeg", "-y",
-                    "-loop", "1",
-                    "-t", str(audio_duration),
-                    "-i", image_path,
-                    "-i", audio_path,
-                    "-vf", f"{filter_str},fade=t=in:st=0:d=1,fade=t=out:st={audio_duration-1}:d=1",
-                    "-c:v", "libx264",
-                    "-c:a", "aac",
-                    "-b:a", "384k",
-                    "-pix_fmt", "yuv420p",
-                    "-shortest",
-                    "-avoid_negative_ts", "make_zero",
-                    "-r", "30",
-                    temp_video
-                ]
-
-                print(f"Creating scene {i} with timed subtitles..." if ADD_SUBTITLES else f"Creating scene {i} without subtitles")
-                subprocess.run(command, check=True)
-
-                f.write(f"file '{os.path.abspath(temp_video)}'\n")
-
-        if not os.path.exists(concat_list_path):
-            raise Exception("Concat list file was not created")
-
-        with open(concat_list_path, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                raise Exception("Concat list file is empty")
-            print("Concat file content:")
-            print(content)
-
-        concat_command = [
-            "ffmpeg", "-y",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", concat_list_path,
-            "-c", "copy",
-            output_video
+    if profile not in ENCODE_PROFILES:
+        raise ValueError(f"Invalid encode profile: {profile}")
+    settings = ENCODE_PROFILES[profile]
+
+    options = [
+        "-c:v", "libx264",
+        "-preset", settings["preset"],
+        "-crf", str(settings["crf"]),
+        "-g", str(settings["gop"]),
+    ]
+    if settings["tune"]:
+        options += ["-tune", settings["tune"]]
+    if settings["x264_params"]:
+        options += ["-x264-params", settings["x264_params"]]
+    if not audio:
+        return options + ["-an"]
+    return options + ["-c:a", "aac", "-b:a", settings["audio_bitrate"]]
+
+
+def build_scene_command(image_path, audio_path, audio_duration, filter_str, temp_video, threads=X264_THREADS,
+                        overlay_path=None, profile=ENCODE_PROFILE):
+    """
+    Build the FFmpeg command that renders one scene to its own MP4
+    """
+    if overlay_path:
+        # Composite the pre-rendered caption with a single overlay filter
+        video_filter = [
+            "-i", overlay_path,
+            "-filter_complex", f"[0:v][2:v]overlay=0:0,{scene_fades(audio_duration)}[v]",
+            "-map", "[v]", "-map", "1:a",
         ]
+    else:
+        video_filter = ["-vf", f"{filter_str},{scene_fades(audio_duration)}"]
+
+    return [
+        "ffmpeg", "-y",
+        "-loop", "1",
+        "-t", str(audio_duration),
+        "-i", image_path,
+        "-i", audio_path,
+        *video_filter,
+        *encode_options(profile),
+        "-threads", str(threads),
+        "-pix_fmt", "yuv420p",
+        "-shortest",
+        "-avoid_negative_ts", "make_zero",
+        "-r", str(FRAME_RATE),
+        temp_video
+    ]
+
+
+def encode_scene(scene_number, command):
+    """
+    Run a scene's FFmpeg command, raising SceneEncodeError on failure
+    """
+    print(f"Creating scene {scene_number} with timed subtitles..." if ADD_SUBTITLES else f"Creating scene {scene_number} without subtitles")
+    result = run_subprocess(
+        command, name="ffmpeg.scene", stdout=subprocess.DEVNULL, scene=scene_number)
+    if result.returncode != 0:
+        raise SceneEncodeError(scene_number, result.returncode, result.stderr)
+    print(f"Scene {scene_number} encoded")
 
-        print("Combining all scenes...")
-        print("Running command:", ' '.join(concat_command))
-        result = subprocess.run(
-            concat_command, stderr=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
 
+def encode_scenes(scene_jobs, jobs=RENDER_JOBS, executor=None):
+    """
+    Encode scenes in parallel. scene_jobs is a list of (scene_number, command);
+    every job is allowed to finish and all failures are reported together.
+    """
+    def run(pool):
+        futures = {
+            scene_number: pool.submit(encode_scene, scene_number, command)
+            for scene_number, command in scene_jobs
+        }
+        failures = []
+        for scene_number, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                failures.append(e if isinstance(e, SceneEncodeError) else
+                                SceneEncodeError(scene_number, None, str(e)))
+        return failures
+
+    if executor is not None:
+        failures = run(executor)
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            failures = run(pool)
+
+    if failures:
+        for failure in failures:
+            print(f"FFmpeg Error: {failure}")
+        failed = ", ".join(str(failure.scene_number) for failure in failures)
+        raise Exception(f"Failed to encode scene(s): {failed}")
+
+
+def concat_scenes(segments, concat_list_path, output_video):
+    """
+    Stream-copy the encoded scene segments, in order, into the final video
+    """
+    with open(concat_list_path, "w", encoding='utf-8') as f:
+        for temp_video in segments:
+            f.write(f"file '{os.path.abspath(temp_video)}'\n")
+
+    with open(concat_list_path, 'r') as f:
+        content = f.read().strip()
+        if not content:
+            raise Exception("Concat list file is empty")
+        print("Concat file content:")
+        print(content)
+
+    concat_command = [
+        "ffmpeg", "-y",
+        "-f", "concat",
+        "-safe", "0",
+        "-i", concat_list_path,
+        "-c", "copy",
+        output_video
+    ]
+
+    print("Combining all scenes...")
+    print("Running command:", ' '.join(concat_command))
+    result = run_subprocess(concat_command, name="ffmpeg.concat", segments=len(segments))
+
+    if result.returncode != 0:
+        print("FFmpeg stderr output:")
+        print(result.stderr)
+        raise subprocess.CalledProcessError(
+            result.returncode, concat_command)
+
+
+def build_single_pass_command(scenes, output_video, profile=ENCODE_PROFILE):
+    """
+    Build one FFmpeg command that renders and concatenates every scene with a
+    single filter_complex graph
+    """
+    inputs = []
+    filters = []
+    concat_pads = []
+    input_count = 0
+
+    for idx, scene in enumerate(scenes):
+        duration = scene["duration"]
+        video_input = input_count
+        audio_input = video_input + 1
+        input_count += 2
+
+        inputs += [
+            "-loop", "1",
+            "-t", str(duration),
+            "-i", scene["image_path"],
+            "-i", scene["audio_path"],
+        ]
+        if scene.get("overlay_path"):
+            inputs += ["-i", scene["overlay_path"]]
+            source = f"[{video_input}:v][{input_count}:v]overlay=0:0"
+            input_count += 1
+        else:
+            source = f"[{video_input}:v]{scene['filter_str']}"
+        filters.append(
+            f"{source},{scene_fades(duration)},"
+            f"fps={FRAME_RATE},format=yuv420p,setsar=1[v{idx}]"
+        )
+        # Pad/trim each narration to the scene length, like -shortest does per segment
+        filters.append(
+            f"[{audio_input}:a]apad,atrim=0:{duration},asetpts=PTS-STARTPTS[a{idx}]"
+        )
+        concat_pads.append(f"[v{idx}][a{idx}]")
+
+    filters.append(
+        f"{''.join(concat_pads)}concat=n={len(scenes)}:v=1:a=1[outv][outa]")
+
+    return [
+        "ffmpeg", "-y",
+        *inputs,
+        "-filter_complex", ";".join(filters),
+        "-map", "[outv]",
+        "-map", "[outa]",
+        *encode_options(profile),
+        "-pix_fmt", "yuv420p",
+        "-r", str(FRAME_RATE),
+        output_video
+    ]
+
+
+def render_single_pass(scenes, output_video, profile=ENCODE_PROFILE):
+    """
+    Render the whole video in one FFmpeg invocation
+    """
+    command = build_single_pass_command(scenes, output_video, profile)
+
+    print(f"Rendering {len(scenes)} scenes in a single pass...")
+    result = run_subprocess(command, name="ffmpeg.single_pass", scenes=len(scenes))
+
+    if result.returncode != 0:
+        print("FFmpeg stderr output:")
+        print(result.stderr)
+        raise subprocess.CalledProcessError(result.returncode, command)
+
+
+def prepare_scene(scene_number, image_path, audio_path, audio_duration, subtitle_text, add_subtitles=None):
+    """
+    Describe one scene for rendering, including its subtitle filter chain.
+    add_subtitles defaults to ADD_SUBTITLES.
+    """
+    print(f"Processing scene {scene_number} with duration {audio_duration} seconds")
+
+    if add_subtitles is None:
+        add_subtitles = ADD_SUBTITLES
+    filter_str = "null"
+    overlay_path = None
+    if add_subtitles and SUBTITLE_MODE == "drawtext":
+        filter_str = build_subtitle_filter(subtitle_text, audio_duration)
+    elif add_subtitles:
+        base_path = os.path.splitext(image_path)[0]
+        overlay_path = render_subtitle_overlay(subtitle_text, f"{base_path}_subtitles.png")
+        if overlay_path and SUBTITLE_MODE == "baked":
+            image_path = bake_subtitles(image_path, overlay_path, f"{base_path}_subtitled.jpg")
+            overlay_path = None
+
+    return {
+        "scene_number": scene_number,
+        "image_path": image_path,
+        "audio_path": audio_path,
+        "duration": audio_duration,
+        "filter_str": filter_str,
+        "overlay_path": overlay_path,
+    }
+
+
+def collect_scenes_from_manifest(manifest, output_dir, add_subtitles=None):
+    """
+    Build the scene list from the audio stage's manifest, reusing its durations and text
+    """
+    scenes = []
+    for entry in sorted(manifest, key=lambda entry: entry["scene_number"]):
+        i = entry["scene_number"]
+        image_path = os.path.join(output_dir, f"image{i}.jpg")
+        audio_path = entry["audio_path"]
+
+        if not os.path.exists(image_path) or not os.path.exists(audio_path):
+            print(f"Missing files for scene {i}")
+            continue
+
+        scenes.append(prepare_scene(
+            i, image_path, audio_path, entry["duration"], entry["text"].replace('\n', ' '), add_subtitles))
+    return scenes
+
+
+def collect_scenes_from_files(output_dir, audio_dir, srt_path='subtitles.srt', add_subtitles=None):
+    """
+    Build the scene list by scanning the audio directory and probing each file
+    """
+    subtitles = read_srt_file(srt_path)
+
+    scene_count = len(
+        [x for x in os.listdir(audio_dir) if x.endswith('.mp3')])
+    print(f"Found {scene_count} audio files")
+
+    scenes = []
+    for i in range(1, scene_count + 1):
+        image_path = os.path.join(output_dir, f"image{i}.jpg")
+        audio_path = os.path.join(audio_dir, f"scene{i}.mp3")
+
+        if not os.path.exists(image_path) or not os.path.exists(audio_path):
+            print(f"Missing files for scene {i}")
+            continue
+
+        audio_duration = get_audio_duration(audio_path)
+        if audio_duration is None:
+            print(f"Could not determine duration for {audio_path}")
+            continue
+
+        subtitle_text = subtitles[i - 1] if i - 1 < len(subtitles) else ""
+        scenes.append(prepare_scene(i, image_path, audio_path, audio_duration, subtitle_text, add_subtitles))
+    return scenes
+
+
+def scene_segment_path(work_dir, scene_number):
+    return os.path.join(work_dir, f"temp_scene_{scene_number}.mp4")
+
+
+def segment_cache_key(scene, profile=ENCODE_PROFILE):
+    """
+    Key a scene's encoded segment by the content of its still, narration and
+    caption overlay, its drawtext chain and duration, and the encode settings
+    """
+    overlay_path = scene.get("overlay_path")
+    return DiskCache.make_key(
+        "segment",
+        hash_file(scene["image_path"]),
+        hash_file(scene["audio_path"]),
+        hash_file(overlay_path) if overlay_path else None,
+        scene["filter_str"],
+        scene["duration"],
+        ENCODE_PROFILES[profile],
+        [VIDEO_WIDTH, VIDEO_HEIGHT, FRAME_RATE],
+    )
+
+
+def restore_segment(key, temp_video):
+    """
+    Copy a cached segment to temp_video, returning False on a miss
+    """
+    cached_path = segment_cache.get_path(key)
+    if cached_path is None:
+        return False
+    shutil.copyfile(cached_path, temp_video)
+    return True
+
+
+def render_scene_segment(scene, work_dir, profile=ENCODE_PROFILE, use_cache=True):
+    """
+    Encode one prepared scene to its temporary segment, or restore it from the
+    segment cache, and return the segment path
+    """
+    temp_video = scene_segment_path(work_dir, scene["scene_number"])
+    key = segment_cache_key(scene, profile) if use_cache else None
+    if key and restore_segment(key, temp_video):
+        print(f"Scene {scene['scene_number']} unchanged; reusing cached segment")
+        return temp_video
+
+    command = build_scene_command(
+        scene["image_path"], scene["audio_path"], scene["duration"], scene["filter_str"], temp_video,
+        overlay_path=scene.get("overlay_path"), profile=profile)
+    encode_scene(scene["scene_number"], command)
+    if key:
+        segment_cache.put_file(key, temp_video)
+    return temp_video
+
+
+def output_target(name, path, width=VIDEO_WIDTH, height=VIDEO_HEIGHT, profile=ENCODE_PROFILE, audio=True,
+                  subtitles=None):
+    """
+    Describe one rendered output: its file, frame size, encode profile and
+    whether it keeps the narration and the burned-in subtitles (subtitles
+    defaults to ADD_SUBTITLES)
+    """
+    if profile not in ENCODE_PROFILES:
+        raise ValueError(f"Invalid encode profile: {profile}")
+    if subtitles is None:
+        subtitles = ADD_SUBTITLES
+    return {"name": name, "path": path, "width": width, "height": height, "profile": profile,
+            "audio": audio, "subtitles": subtitles}
+
+
+def variant_targets(variants, output_video, profile=ENCODE_PROFILE):
+    """
+    Build output targets for named OUTPUT_VARIANTS. "final" is written to
+    output_video; the others alongside it as <name>_<variant>.mp4.
+    """
+    base, extension = os.path.splitext(output_video)
+    targets = []
+    for variant in variants:
+        if variant not in OUTPUT_VARIANTS:
+            raise ValueError(f"Invalid output variant: {variant}")
+        path = output_video if variant == "final" else f"{base}_{variant}{extension}"
+        targets.append(output_target(variant, path, **{"profile": profile, **OUTPUT_VARIANTS[variant]}))
+    return targets
+
+
+def pick_master(targets):
+    """
+    Choose what to render for a group of targets sharing a subtitle setting.
+    A full-size target with audio is rendered directly and the rest are
+    derived from it; otherwise a temporary master is rendered with the
+    highest-quality (lowest CRF) profile in the group. Returns (master target
+    or None, master profile).
+    """
+    for target in targets:
+        if (target["width"], target["height"]) == (VIDEO_WIDTH, VIDEO_HEIGHT) and target["audio"]:
+            return target, target["profile"]
+    best = min(targets, key=lambda target: ENCODE_PROFILES[target["profile"]]["crf"])
+    return None, best["profile"]
+
+
+def build_fan_out_command(master_path, targets, master_profile=ENCODE_PROFILE):
+    """
+    One FFmpeg command that produces every target from the master. Targets at
+    the master's size and encode profile are stream-copied (dropping the audio
+    if muted); the rest share a single decode that is split and
+    scaled/encoded per target.
+    """
+    copies = [target for target in targets
+              if (target["width"], target["height"]) == (VIDEO_WIDTH, VIDEO_HEIGHT)
+              and target["profile"] == master_profile]
+    encodes = [target for target in targets if target not in copies]
+
+    filters = []
+    if encodes:
+        labels = [f"s{idx}" for idx in range(len(encodes))]
+        filters.append(f"[0:v]split={len(encodes)}{''.join(f'[{label}]' for label in labels)}")
+        for idx, (label, target) in enumerate(zip(labels, encodes)):
+            filters.append(f"[{label}]scale={target['width']}:{target['height']}:flags=lanczos,setsar=1[v{idx}]")
+
+    outputs = []
+    for target in targets:
+        audio = ["-map", "0:a"] if target["audio"] else []
+        if target in copies:
+            outputs += ["-map", "0:v", *audio, "-c", "copy", *([] if target["audio"] else ["-an"]), target["path"]]
+            continue
+        outputs += [
+            "-map", f"[v{encodes.index(target)}]", *audio,
+            *encode_options(target["profile"], audio=target["audio"]),
+            "-pix_fmt", "yuv420p",
+            target["path"],
+        ]
+
+    return [
+        "ffmpeg", "-y",
+        "-i", master_path,
+        *(["-filter_complex", ";".join(filters)] if filters else []),
+        *outputs,
+    ]
+
+
+def fan_out(master_path, targets, master_profile=ENCODE_PROFILE, executor=None):
+    """
+    Produce every target from the rendered master in a single FFmpeg process
+    """
+    if not targets:
+        return
+    command = build_fan_out_command(master_path, targets, master_profile)
+    print(f"Deriving {', '.join(target['name'] for target in targets)} from {master_path}...")
+
+    def run():
+        result = run_subprocess(command, name="ffmpeg.fan_out", outputs=len(targets))
         if result.returncode != 0:
             print("FFmpeg stderr output:")
             print(result.stderr)
-            raise subprocess.CalledProcessError(
-                result.returncode, concat_command)
+            raise subprocess.CalledProcessError(result.returncode, command)
+
+    if executor is not None:
+        executor.submit(run).result()
+    else:
+        run()
+
+
+def render_targets(output_dir, audio_dir, targets, work_dir=None, executor=None, **render_options):
+    """
+    Render every output target: targets are grouped by subtitle setting, each
+    group's master is rendered once through the normal scene pipeline, and the
+    group's other targets are derived from it with fan_out(). Returns the
+    paths that were produced.
+    """
+    base_dir = work_dir or os.getcwd()
+    produced = []
+    groups = {}
+    for target in targets:
+        groups.setdefault(target["subtitles"], []).append(target)
+
+    for subtitles, group in groups.items():
+        master_target, master_profile = pick_master(group)
+        master_path = master_target["path"] if master_target else os.path.join(
+            base_dir, f"temp_master{'' if subtitles else '_clean'}.mp4")
+        rendered = create_video_with_audio_and_subtitles(
+            output_dir, audio_dir, master_path, executor=executor, work_dir=work_dir, profile=master_profile,
+            add_subtitles=subtitles, **render_options)
+        if not rendered:
+            print(f"Skipping {', '.join(target['name'] for target in group)}: the master render failed")
+            continue
+
+        derived = [target for target in group if target is not master_target]
+        try:
+            fan_out(master_path, derived, master_profile, executor=executor)
+            produced += [target["path"] for target in group]
+        except subprocess.CalledProcessError as e:
+            print(f"FFmpeg Error: {e}")
+            if master_target:
+                produced.append(master_path)
+        finally:
+            if not master_target and os.path.exists(master_path):
+                os.remove(master_path)
+    return produced
+
+
+def create_video_with_audio_and_subtitles(output_dir, audio_dir, output_video, jobs=RENDER_JOBS, executor=None, mode=RENDER_MODE,
+                                          manifest=None, srt_path='subtitles.srt', work_dir=None, profile=ENCODE_PROFILE,
+                                          use_cache=True, add_subtitles=None):
+    """
+    Create video with audio and subtitles using CPS-based timing.
+    When the audio stage's manifest is given its durations and text are used
+    directly; otherwise the audio directory is scanned and probed. Temporary
+    scene files and the concat list go in work_dir (default: the current directory).
+    profile selects the x264/AAC settings from ENCODE_PROFILES. With use_cache,
+    segments whose inputs are unchanged are restored from the segment cache and
+    only the other scenes are re-encoded ("segments" mode only). add_subtitles
+    overrides ADD_SUBTITLES. Returns True once output_video has been written.
+    """
+    if mode not in ("segments", "single_pass"):
+        raise ValueError(f"Invalid render mode: {mode}")
+    if profile not in ENCODE_PROFILES:
+        raise ValueError(f"Invalid encode profile: {profile}")
+    if SUBTITLE_MODE not in ("drawtext", "overlay", "baked"):
+        raise ValueError(f"Invalid subtitle mode: {SUBTITLE_MODE}")
+
+    try:
+        base_dir = work_dir or os.getcwd()
+        concat_list_path = os.path.join(base_dir, "concat_list.txt")
+
+        if manifest:
+            scenes = collect_scenes_from_manifest(manifest, output_dir, add_subtitles)
+        else:
+            scenes = collect_scenes_from_files(output_dir, audio_dir, srt_path, add_subtitles)
+
+        if not scenes:
+            raise Exception("No scenes to render")
+
+        if mode == "single_pass":
+            if executor is not None:
+                executor.submit(render_single_pass, scenes, output_video, profile).result()
+            else:
+                render_single_pass(scenes, output_video, profile)
+            print("Video created successfully!")
+            return True
+
+        scene_jobs = []
+        segments = []
+        new_segments = []
+        for scene in scenes:
+            temp_video = scene_segment_path(base_dir, scene["scene_number"])
+            segments.append(temp_video)
+            key = segment_cache_key(scene, profile) if use_cache else None
+            if key and restore_segment(key, temp_video):
+                continue
+            command = build_scene_command(
+                scene["image_path"], scene["audio_path"], scene["duration"], scene["filter_str"], temp_video,
+                overlay_path=scene.get("overlay_path"), profile=profile)
+            scene_jobs.append((scene["scene_number"], command))
+            new_segments.append((key, temp_video))
+
+        print(f"Encoding {len(scene_jobs)} of {len(scenes)} scenes; "
+              f"{len(scenes) - len(scene_jobs)} unchanged scenes reuse cached segments")
+        encode_scenes(scene_jobs, jobs=jobs, executor=executor)
+        for key, temp_video in new_segments:
+            if key:
+                segment_cache.put_file(key, temp_video)
+
+        # Write the concat list in scene order once every encode has finished
+        concat_scenes(segments, concat_list_path, output_video)
 
         print("Video created successfully!")
 
         # Cleanup temporary files
-        for i in range(1, scene_count + 1):
-            temp_file = os.path.join(base_dir, f"temp_scene_{i}.mp4")
+        for temp_file in segments:
             if os.path.exists(temp_file):
                 os.remove(temp_file)
         os.remove(concat_list_path)
+        return True
 
     except subprocess.CalledProcessError as e:
         print(f"FFmpeg Error: {e}")
@@ -285,6 +973,7 @@ def create_video_with_audio_and_subtitles(output_dir, audio_dir, output_video):
             e, 'output') else 'No output available')
     except Exception as e:
         print(f"Error: {e}")
+    return False
 
 
 # def main():